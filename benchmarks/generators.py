@@ -0,0 +1,146 @@
+import pandas as pd
+import numpy as np
+from pathlib import Path
+from dataclasses import dataclass, asdict
+from string import ascii_uppercase
+import json
+import yaml
+
+REGIONS = ["Asia", "Latin America", "EMEA"]
+# Same World Bank indicators the collectors fetch
+INDICATORS = ['NY.GDP.MKTP.KD.ZG', 'FP.CPI.TOTL.ZG', 'GC.DOD.TOTL.GD.ZS', 'BN.CAB.XOKA.GD.ZS']
+WORDS = ["growth", "strong", "crisis", "default", "rally", "record", "inflation", "slump", "recovery",
+         "investors", "central", "bank", "rates", "currency", "weak", "surge", "exports", "stable"]
+
+
+@dataclass
+class Scale:
+    countries: int = 17
+    years: int = 10
+    news_days: int = 30
+    articles_per_day: int = 20
+    seed: int = 0
+
+
+@dataclass
+class Country:
+    code: str
+    name: str
+    region: str
+    currency: str
+
+    @property
+    def pair(self) -> str:
+        return f"USD{self.currency}"
+
+
+def make_countries(n: int) -> list:
+    """`n` synthetic countries spread round-robin over the regions (up to 676)"""
+    if n > len(ascii_uppercase) ** 2:
+        raise ValueError(f"At most {len(ascii_uppercase) ** 2} synthetic countries are supported")
+    countries = []
+    for i in range(n):
+        suffix = ascii_uppercase[i // 26] + ascii_uppercase[i % 26]
+        countries.append(Country(f"X{suffix}", f"Country {suffix}", REGIONS[i % len(REGIONS)], f"Y{suffix}"))
+    return countries
+
+
+def write_config(config_root: Path, countries: list):
+    """countries_regions.yaml for the synthetic countries (other config is read from the repo)"""
+    config_root.mkdir(parents=True, exist_ok=True)
+    config = {
+        'regions': {
+            region: {'countries': [c.code for c in countries if c.region == region]} for region in REGIONS
+        },
+        'country_mapping': {c.name: c.code for c in countries},
+    }
+    with open(config_root / "countries_regions.yaml", "w") as f:
+        yaml.safe_dump(config, f, sort_keys=False)
+
+
+def write_world_bank(data_root: Path, countries: list, years: int, rng: np.random.Generator,
+                     collected: str = "20250101") -> int:
+    """One World Bank JSON response per country and indicator; returns the file count"""
+    last_year = 2024
+    files = 0
+    for country in countries:
+        folder = data_root / "raw/macroeconomic" / country.region
+        folder.mkdir(parents=True, exist_ok=True)
+        for indicator in INDICATORS:
+            values = rng.normal(3, 4, years).round(3)
+            records = [{
+                'indicator': {'id': indicator, 'value': indicator},
+                'country': {'id': country.code[:2], 'value': country.name},
+                'countryiso3code': country.code,
+                'date': str(last_year - i),
+                # The latest year is usually not published yet
+                'value': None if i == 0 else float(values[i]),
+                'unit': '', 'obs_status': '', 'decimal': 1,
+            } for i in range(years)]
+            header = {'page': 1, 'pages': 1, 'per_page': 1000, 'total': years}
+            with open(folder / f"{country.code}_{indicator}_{collected}.json", "w") as f:
+                json.dump([header, records], f)
+            files += 1
+    return files
+
+
+def write_fx(data_root: Path, countries: list, years: int, rng: np.random.Generator,
+             collected: str = "20250101") -> int:
+    """Daily OHLCV CSVs per pair, like fetch_save_fx_rates writes; returns the bar count"""
+    dates = pd.bdate_range(end="2024-12-31", periods=years * 252, name="Date")
+    bars = 0
+    for country in countries:
+        folder = data_root / "raw/fx" / country.region.replace(" ", "_")
+        folder.mkdir(parents=True, exist_ok=True)
+        close = rng.uniform(1, 100) * np.exp(np.cumsum(rng.normal(0, rng.uniform(0.002, 0.02), len(dates))))
+        spread = np.abs(rng.normal(0, 0.003, len(dates))) * close
+        pd.DataFrame({
+            'Open': close * (1 + rng.normal(0, 0.001, len(dates))),
+            'High': close + spread,
+            'Low': close - spread,
+            'Close': close,
+            'Volume': 0,
+        }, index=dates).to_csv(folder / f"{country.pair}_{collected}.csv")
+        bars += len(dates)
+    return bars
+
+
+def write_news(data_root: Path, countries: list, days: int, per_day: int, rng: np.random.Generator) -> int:
+    """One news parquet per country and collection day; returns the article count"""
+    days_index = pd.date_range(end="2024-12-31", periods=days, freq="D")
+    articles = 0
+    for country in countries:
+        folder = data_root / "raw/news" / country.region.replace(" ", "_") / country.name.replace(" ", "_")
+        folder.mkdir(parents=True, exist_ok=True)
+        for day in days_index:
+            words = rng.choice(WORDS, size=(per_day, 40))
+            published = day + pd.to_timedelta(rng.integers(0, 86400, per_day), unit="s")
+            pd.DataFrame({
+                'title': [" ".join(w[:8]) for w in words],
+                'description': [" ".join(w[8:20]) for w in words],
+                'publishedAt': published.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                'source': "Synthetic Wire",
+                'url': [f"https://news.example/{country.code}/{day:%Y%m%d}/{i}" for i in range(per_day)],
+                'content': [" ".join(w) for w in words],
+            }).to_parquet(folder / f"{day:%Y%m%d}.parquet")
+            articles += per_day
+    return articles
+
+
+def generate_dataset(root: Path, scale: Scale) -> dict:
+    """Write config and raw data for `scale` under `root`, in the layout the collectors use.
+
+    Everything derives from `scale.seed`, so a given scale always produces the
+    same files. Countries are synthetic (XAA, XAB, ...) with a matching
+    countries_regions.yaml under root/config. Returns what was generated.
+    """
+    rng = np.random.default_rng(scale.seed)
+    countries = make_countries(scale.countries)
+    write_config(root / "config", countries)
+    return {
+        'scale': asdict(scale),
+        'countries': countries,
+        'macro_files': write_world_bank(root / "data", countries, scale.years, rng),
+        'fx_bars': write_fx(root / "data", countries, scale.years, rng),
+        'news_articles': write_news(root / "data", countries, scale.news_days, scale.articles_per_day, rng),
+    }
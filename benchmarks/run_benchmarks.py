@@ -0,0 +1,229 @@
+import pandas as pd
+from pathlib import Path
+from contextlib import redirect_stdout
+from dataclasses import asdict
+from datetime import datetime, timezone
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+import json
+import time
+import zlib
+import io
+import os
+import sys
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+sys.path.append(str(Path(__file__).parent))
+from generators import Scale, generate_dataset
+from instrumentation import METRICS
+import data_processing.process_macro_data as process_macro_data
+import data_processing.fx_store as fx_store
+import data_processing.fx_forecasting as fx_forecasting
+import data_processing.volatility_calculations as volatility_calculations
+import data_processing.process_news_sentiment as process_news_sentiment
+import data_processing.risk_assessment as risk_assessment
+
+RESULTS_PATH = Path(__file__).parent / "results"
+
+
+class StubSentimentModel:
+    """Stands in for the Hugging Face pipeline: deterministic labels and an optional per-text cost"""
+    def __init__(self, seconds_per_text: float = 0.0):
+        self.seconds_per_text = seconds_per_text
+
+    def __call__(self, texts, batch_size: int = None, truncation: bool = True, **kwargs):
+        texts = [texts] if isinstance(texts, str) else list(texts)
+        if self.seconds_per_text:
+            time.sleep(self.seconds_per_text * len(texts))
+        results = []
+        for text in texts:
+            h = zlib.crc32(text.encode("utf-8"))
+            results.append({'label': 'POS' if h % 2 else 'NEG', 'score': 0.5 + (h % 1000) / 2000})
+        return results
+
+
+def _stub_forecast(series: pd.Series, start_params=None) -> tuple:
+    return float(series.iloc[-1]), None
+
+
+def use_dataset(root: Path):
+    """Point every processing module at the synthetic data and config under `root`"""
+    data, config = root / "data", root / "config"
+    process_macro_data.DATA_PATH = data
+    process_macro_data.CONFIG_PATH = config
+    fx_store.RAW_FX_PATH = data / "raw/fx"
+    fx_store.STORE_PATH = data / "processed/fx_prices"
+    fx_forecasting.CACHE_PATH = data / "cache/forecasts"
+    volatility_calculations.DATA_PATH = data
+    volatility_calculations.CONFIG_PATH = config
+    process_news_sentiment.DATA_PATH = data
+    process_news_sentiment.CONFIG_PATH = config
+    risk_assessment.DATA_PATH = data
+
+
+def bench(name: str, func, repeat: int, items: int, setup=None, verbose: bool = False) -> dict:
+    """Time `func` `repeat` times (after a fresh `setup` each time) and report throughput"""
+    seconds = []
+    METRICS.reset()
+    for _ in range(repeat):
+        state = setup() if setup else None
+        with redirect_stdout(sys.stdout if verbose else io.StringIO()):
+            start = time.perf_counter()
+            func(state) if setup else func()
+            seconds.append(time.perf_counter() - start)
+    median = statistics.median(seconds)
+    result = {
+        'name': name,
+        'repeats': repeat,
+        'items': items,
+        'min_s': min(seconds),
+        'median_s': median,
+        'mean_s': statistics.mean(seconds),
+        'max_s': max(seconds),
+        'items_per_s': items / median if median > 0 else None,
+        'seconds': seconds,
+        'counters': METRICS.snapshot()['counters'],
+    }
+    print(f"{name:<24} median {median:8.3f}s  min {min(seconds):8.3f}s  {result['items_per_s'] or 0:12.1f} items/s")
+    return result
+
+
+def run_suite(scale: Scale, root: Path, repeat: int = 3, stub_forecasts: bool = False,
+              hf_seconds_per_text: float = 0.0, verbose: bool = False) -> dict:
+    """Generate the synthetic dataset under `root` and benchmark each processing stage on it"""
+    start = time.perf_counter()
+    generated = generate_dataset(root, scale)
+    print(f"Generated {generated['macro_files']} World Bank files, {generated['fx_bars']} FX bars and "
+          f"{generated['news_articles']} articles in {time.perf_counter() - start:.1f}s")
+    use_dataset(root)
+    countries = generated['countries']
+    if stub_forecasts:
+        fx_forecasting.FORECASTERS.update(arima=_stub_forecast, prophet=_stub_forecast)
+
+    def fx_calculator():
+        calculator = volatility_calculations.FXVolatility(
+            use_forecast_cache=False, forecast_workers=1 if stub_forecasts else None
+        )
+        # FXVolatility maps real currencies only; add the synthetic ones
+        calculator.country_map.update({c.currency: c.code for c in countries})
+        return calculator
+
+    def sentiment_processor():
+        processor = process_news_sentiment.NewsSentimentProcessor(use_cache=False)
+        processor._hf_pipeline = StubSentimentModel(hf_seconds_per_text)
+        return processor
+
+    results = [
+        bench("macro_full", lambda: process_macro_data.process_macro_data(full_refresh=True),
+              repeat, generated['macro_files'], verbose=verbose),
+        bench("macro_incremental", lambda: process_macro_data.process_macro_data(),
+              repeat, generated['macro_files'], verbose=verbose),
+        bench("fx_consolidate", lambda: fx_store.consolidate_fx_store(force=True),
+              repeat, generated['fx_bars'], verbose=verbose),
+        bench("fx_load", fx_calculator, repeat, generated['fx_bars'], verbose=verbose),
+        bench("fx_volatility", lambda calculator: calculator.save_volatility_data(),
+              repeat, generated['fx_bars'], setup=fx_calculator, verbose=verbose),
+        bench("sentiment_full", lambda processor: processor.process_sentiment(full_refresh=True),
+              repeat, generated['news_articles'], setup=sentiment_processor, verbose=verbose),
+        bench("sentiment_incremental", lambda processor: processor.process_sentiment(),
+              repeat, generated['news_articles'], setup=sentiment_processor, verbose=verbose),
+        bench("risk_scores", lambda: risk_assessment.RiskAssessor().calculate_scores(),
+              repeat, len(countries), verbose=verbose),
+    ]
+    return {
+        'created': datetime.now(timezone.utc).isoformat(),
+        'git_commit': _git_commit(),
+        'environment': _environment(),
+        'scale': asdict(scale),
+        'options': {'repeat': repeat, 'stub_forecasts': stub_forecasts, 'hf_seconds_per_text': hf_seconds_per_text},
+        'generated': {k: v for k, v in generated.items() if k not in ('scale', 'countries')},
+        'benchmarks': results,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).parent, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def _environment() -> dict:
+    import numpy as np
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.2) -> list:
+    """Benchmarks whose median time grew by more than `tolerance` against `baseline`"""
+    if current['scale'] != baseline['scale']:
+        print(f"Warning: comparing different scales {current['scale']} vs {baseline['scale']}")
+    before = {b['name']: b for b in baseline['benchmarks']}
+    regressions = []
+    print(f"\n{'benchmark':<24}{'baseline':>12}{'current':>12}{'change':>10}")
+    for result in current['benchmarks']:
+        if result['name'] not in before:
+            continue
+        old, new = before[result['name']]['median_s'], result['median_s']
+        change = new / old - 1 if old > 0 else 0.0
+        flag = "  REGRESSION" if change > tolerance else ""
+        print(f"{result['name']:<24}{old:>11.3f}s{new:>11.3f}s{change:>+10.1%}{flag}")
+        if flag:
+            regressions.append(result['name'])
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the processing pipeline on synthetic data")
+    parser.add_argument("--countries", type=int, default=Scale.countries)
+    parser.add_argument("--years", type=int, default=Scale.years, help="years of macro and FX history")
+    parser.add_argument("--news-days", type=int, default=Scale.news_days)
+    parser.add_argument("--articles-per-day", type=int, default=Scale.articles_per_day)
+    parser.add_argument("--seed", type=int, default=Scale.seed)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--stub-forecasts", action="store_true", help="replace ARIMA/Prophet with a last-value forecast")
+    parser.add_argument("--hf-seconds-per-text", type=float, default=0.0,
+                        help="simulated inference cost of the stub sentiment model")
+    parser.add_argument("--data-dir", default=None, help="keep the generated data here instead of a temp dir")
+    parser.add_argument("--output", default=None, help="results file, defaults to benchmarks/results/<timestamp>.json")
+    parser.add_argument("--compare", default=None, help="baseline results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed median slowdown before flagging")
+    parser.add_argument("--verbose", action="store_true", help="show the pipeline's own output")
+    args = parser.parse_args()
+
+    scale = Scale(args.countries, args.years, args.news_days, args.articles_per_day, args.seed)
+    options = dict(repeat=args.repeat, stub_forecasts=args.stub_forecasts,
+                   hf_seconds_per_text=args.hf_seconds_per_text, verbose=args.verbose)
+    if args.data_dir:
+        root = Path(args.data_dir)
+        if root.exists() and any(root.iterdir()):
+            parser.error(f"--data-dir {root} must be empty")
+        results = run_suite(scale, root, **options)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            results = run_suite(scale, Path(tmp), **options)
+
+    output = Path(args.output) if args.output else RESULTS_PATH / f"bench_{datetime.now():%Y%m%dT%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Saved benchmark results to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
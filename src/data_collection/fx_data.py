@@ -4,6 +4,11 @@ import pandas as pd
 from pathlib import Path
 import time
 import sys
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(str(Path(__file__).parent.parent))
+from data_processing.fx_store import consolidate_fx_store
+from instrumentation import timed, count, instrumented_run
 
 CONFIG_PATH = Path(__file__).parent.parent.parent / "config"
 DATA_PATH = Path(__file__).parent.parent.parent / "data/raw/fx"
@@ -14,6 +19,12 @@ def load_fx_config() -> dict:
         return yaml.safe_load(f)['fx_pairs']
 
 
+@timed("fx.yf_download")
+def download(tickers, **kwargs) -> pd.DataFrame:
+    """yf.download, timed"""
+    return yf.download(tickers, **kwargs)
+
+
 def fetch_save_fx_rates():
     """Fetch and store FX rates using yfinance for the last three months"""
     fx_config = load_fx_config()
@@ -27,7 +38,7 @@ def fetch_save_fx_rates():
                 # Construct the yfinance ticker (e.g., "EURUSD=X")
                 ticker = f"{pair}=X"
                 # Download three months of historical daily data
-                data = yf.download(ticker, period='1Y', interval='1d')
+                data = download(ticker, period='1Y', interval='1d')
                 if data.empty:
                     print(f"No data found for {pair}")
                     continue
@@ -46,10 +57,161 @@ def fetch_save_fx_rates():
                 print(f"Failed to fetch {pair}: {str(e)}")
                 continue
 
-def main():
+def store_path(region: str, pair: str) -> Path:
+    """Location of the single per-pair Parquet store"""
+    return DATA_PATH / region.replace(" ", "_") / f"{pair}.parquet"
+
+
+def load_last_timestamp(path: Path):
+    """Return the last stored Date for a pair, or None if nothing is stored yet"""
+    if not path.exists():
+        return None
+    dates = pd.read_parquet(path, columns=[]).index
+    return dates.max() if len(dates) else None
+
+
+def append_to_store(data: pd.DataFrame, path: Path) -> int:
+    """Append new bars to a pair store, de-duplicating on Date. Returns rows added."""
+    data = data.copy()
+    data.index = pd.to_datetime(data.index).tz_localize(None)
+    data.index.name = 'Date'
+
+    if path.exists():
+        existing = pd.read_parquet(path)
+        before = len(existing)
+        combined = pd.concat([existing, data])
+    else:
+        before = 0
+        combined = data
+
+    # A re-downloaded bar replaces the stored one (the last bar may have been partial)
+    combined = combined[~combined.index.duplicated(keep='last')].sort_index()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    combined.to_parquet(path)
+    count("fx.bars_added", len(combined) - before)
+    return len(combined) - before
+
+
+def update_fx_store():
+    """Download only the bars missing from each pair's Parquet store"""
+    fx_config = load_fx_config()
+    total_rows = 0
+    start_time = time.perf_counter()
+
+    for region, pairs in fx_config.items():
+        for pair in pairs:
+            path = store_path(region, pair)
+            try:
+                last = load_last_timestamp(path)
+                ticker = f"{pair}=X"
+                if last is None:
+                    data = download(ticker, period='1Y', interval='1d')
+                else:
+                    # Start at the last stored bar so a partial bar gets refreshed
+                    data = download(ticker, start=last.strftime('%Y-%m-%d'), interval='1d')
+                if data.empty:
+                    print(f"No new data for {pair}")
+                    continue
+
+                if isinstance(data.columns, pd.MultiIndex):
+                    data.columns = data.columns.get_level_values(0)
+
+                added = append_to_store(data, path)
+                total_rows += added
+                print(f"Updated {pair}: {added} new bars")
+
+            except Exception as e:
+                print(f"Failed to update {pair}: {str(e)}")
+                continue
+
+    n_pairs = sum(len(pairs) for pairs in fx_config.values())
+    print(f"Per-pair download: {n_pairs} pairs in {time.perf_counter() - start_time:.2f}s")
+    return total_rows
+
+
+def split_batch(data: pd.DataFrame, pairs: list) -> dict:
+    """Split a multi-ticker yf.download frame into one OHLCV frame per pair"""
+    frames = {}
+    for pair in pairs:
+        ticker = f"{pair}=X"
+        if ticker not in data.columns.get_level_values(0):
+            continue
+        frame = data[ticker].dropna(how='all')
+        if not frame.empty:
+            frames[pair] = frame
+    return frames
+
+
+def update_fx_store_batched(chunk_size: int = 16, max_workers: int = 8) -> int:
+    """Download missing bars for all pairs in chunked multi-ticker calls.
+
+    Each chunk is requested from the earliest last-stored bar among its pairs
+    (or a full year if any pair has no store yet), split per pair and written
+    to the per-pair stores in parallel.
+    """
+    fx_config = load_fx_config()
+    pair_paths = {
+        pair: store_path(region, pair)
+        for region, pairs in fx_config.items()
+        for pair in pairs
+    }
+    pairs = list(pair_paths)
+    total_rows = 0
+    start_time = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for i in range(0, len(pairs), chunk_size):
+            chunk = pairs[i:i + chunk_size]
+            batch_start = time.perf_counter()
+            try:
+                lasts = [load_last_timestamp(pair_paths[pair]) for pair in chunk]
+                tickers = [f"{pair}=X" for pair in chunk]
+                if any(last is None for last in lasts):
+                    data = download(tickers, period='1Y', interval='1d', group_by='ticker')
+                else:
+                    data = download(tickers, start=min(lasts).strftime('%Y-%m-%d'),
+                                    interval='1d', group_by='ticker')
+            except Exception as e:
+                print(f"Failed to fetch batch {chunk}: {str(e)}")
+                continue
+            download_time = time.perf_counter() - batch_start
+
+            frames = split_batch(data, chunk) if not data.empty else {}
+            futures = {
+                pair: executor.submit(append_to_store, frame, pair_paths[pair])
+                for pair, frame in frames.items()
+            }
+            batch_rows = 0
+            for pair, future in futures.items():
+                try:
+                    batch_rows += future.result()
+                except Exception as e:
+                    print(f"Failed to store {pair}: {str(e)}")
+            total_rows += batch_rows
+
+            missing = sorted(set(chunk) - set(frames))
+            print(
+                f"Batch {i // chunk_size + 1}: {len(frames)}/{len(chunk)} pairs, {batch_rows} new bars, "
+                f"download {download_time:.2f}s, total {time.perf_counter() - batch_start:.2f}s"
+                + (f" (no data: {', '.join(missing)})" if missing else "")
+            )
+
+    print(f"Batched download: {len(pairs)} pairs in {time.perf_counter() - start_time:.2f}s")
+    return total_rows
+
+
+def main(incremental: bool = True, batched: bool = True):
     print("Starting FX data collection using yfinance...")
-    fetch_save_fx_rates()
+    if not incremental:
+        fetch_save_fx_rates()
+    elif batched:
+        update_fx_store_batched()
+    else:
+        update_fx_store()
+    # Merge the new raw files into the consolidated store once, so readers never have to
+    consolidate_fx_store()
     print("FX data collection completed!")
 
 if __name__ == "__main__":
-    main()
+    with instrumented_run("fx_data"):
+        main(incremental="--full" not in sys.argv, batched="--per-pair" not in sys.argv)
@@ -1,47 +1,122 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import yaml
 import pandas as pd
 from pathlib import Path
 import time
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+import argparse
 import json
+import sys
+
+sys.path.append(str(Path(__file__).parent.parent))
+from instrumentation import timed, count, instrumented_run
 
 CONFIG_PATH = Path(__file__).parent.parent.parent / "config"
 DATA_PATH = Path(__file__).parent.parent.parent / "data/raw/macroeconomic"
+WORLD_BANK_URL = "http://api.worldbank.org/v2"
+START_YEAR = 2015
 
 def load_config(file: str) -> dict:
     with open(CONFIG_PATH / file) as f:
         return yaml.safe_load(f)
 
-def fetch_country_indicator(country: str, indicator: str) -> dict:
-    """Fetch single indicator for a country"""
-    start_year = 2015
+def load_region_lookup() -> dict:
+    """Map each country code to its region folder name"""
+    region_config = load_config("countries_regions.yaml")
+    return {
+        country: region.replace(" ", "_")
+        for region, countries in region_config["regions"].items()
+        for country in countries["countries"]
+    }
+
+def build_session(pool_size: int = 10, retries: int = 3, backoff: float = 0.5) -> requests.Session:
+    """Create a pooled HTTP session that retries transient errors with exponential backoff"""
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class RateLimiter:
+    """Thread-safe limiter spacing requests at most `rate` per second"""
+    def __init__(self, rate: float = None):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+@timed("macro.fetch_country_indicator")
+def fetch_country_indicator(country: str, indicator: str, session: requests.Session = None,
+                            base_url: str = WORLD_BANK_URL) -> dict:
+    """Fetch single indicator for a country.
+
+    `country` may be a semicolon-joined list of codes (e.g. "BRA;MEX"), in which
+    case every page of the response is collected into a single payload.
+    """
     current_year = datetime.now().year
     # Append date range parameters to the URL.
     url = (
-        f"http://api.worldbank.org/v2/country/{country}/indicator/{indicator}"
-        f"?format=json&date={start_year}:{current_year}"
+        f"{base_url}/country/{country}/indicator/{indicator}"
+        f"?format=json&date={START_YEAR}:{current_year}&per_page=1000"
     )
-    
+    http = session or requests
+
     try:
-        response = requests.get(url, timeout=10)
+        response = http.get(url, timeout=10)
         response.raise_for_status()
-        return response.json()
+        data = response.json()
+        # Multi-country requests can span several pages
+        pages = data[0].get('pages', 1) if data and isinstance(data[0], dict) else 1
+        for page in range(2, pages + 1):
+            response = http.get(f"{url}&page={page}", timeout=10)
+            response.raise_for_status()
+            data[1].extend(response.json()[1] or [])
+        count("macro.pages_fetched", pages)
+        return data
     except Exception as e:
+        count("macro.fetch_errors")
         print(f"Error fetching {indicator} for {country}: {str(e)}")
         return None
 
-def save_data(data: dict, country: str, indicator: str):
+def split_by_country(data: list) -> dict:
+    """Split a multi-country World Bank response into per-country payloads"""
+    if not data or len(data) < 2 or not data[1]:
+        return {}
+    per_country = {}
+    for item in data[1]:
+        per_country.setdefault(item['countryiso3code'], []).append(item)
+    return {country: [data[0], items] for country, items in per_country.items()}
+
+def save_data(data: dict, country: str, indicator: str, region_lookup: dict = None):
     """Save raw JSON response with timestamp"""
     if not data or len(data) < 2:
         return
-        
-    region_config = load_config("countries_regions.yaml")
-    for region, countries in region_config["regions"].items():
-        if country in countries["countries"]:
-            region_folder = region.replace(" ", "_")
-            break
-    
+
+    region_lookup = region_lookup or load_region_lookup()
+    region_folder = region_lookup[country]
+
     file_path = DATA_PATH / region_folder / f"{country}_{indicator}_{datetime.now().strftime('%Y%m%d')}.json"
     file_path.parent.mkdir(parents=True, exist_ok=True)
     
@@ -49,20 +124,73 @@ def save_data(data: dict, country: str, indicator: str):
         json.dump(data, f)
     print(f"Saved {indicator} for {country} to {file_path}")
 
-def main():
+def _chunks(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def collect_concurrent(max_workers: int = 8, rate: float = None, countries_per_request: int = 20,
+                       base_url: str = WORLD_BANK_URL, save: bool = True) -> dict:
+    """Fetch all indicators for all countries over a thread pool.
+
+    Countries are grouped into semicolon-joined batches of `countries_per_request`
+    and every request goes through one pooled session. `rate` caps requests per
+    second across all workers. Returns {(country, indicator): payload}.
+    """
+    indicators = [i for group in load_config("indicators.yaml")["indicators"].values() for i in group]
+    region_lookup = load_region_lookup()
+    countries = list(region_lookup)
+
+    session = build_session(pool_size=max_workers)
+    limiter = RateLimiter(rate)
+
+    def task(batch, indicator):
+        limiter.wait()
+        return batch, indicator, fetch_country_indicator(";".join(batch), indicator, session, base_url)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(task, batch, indicator)
+            for indicator in indicators
+            for batch in _chunks(countries, countries_per_request)
+        ]
+        for future in as_completed(futures):
+            batch, indicator, data = future.result()
+            for country, payload in split_by_country(data).items():
+                if country not in region_lookup:
+                    continue
+                results[(country, indicator)] = payload
+                if save:
+                    save_data(payload, country, indicator, region_lookup)
+    session.close()
+    return results
+
+def main(concurrent: bool = True, max_workers: int = 8, rate: float = None, countries_per_request: int = 20):
     print("Starting macroeconomic data collection...")
+    if concurrent:
+        start = time.perf_counter()
+        results = collect_concurrent(max_workers, rate, countries_per_request)
+        print(f"Collected {len(results)} country/indicator series in {time.perf_counter() - start:.1f}s")
+        return
+
     indicators_config = load_config("indicators.yaml")
-    
+    region_lookup = load_region_lookup()
+
     for category, indicators in indicators_config["indicators"].items():
         print(f"\nFetching {category} indicators:")
         for indicator in indicators:
-            countries_config = load_config("countries_regions.yaml")
-            for region, countries in countries_config["regions"].items():
-                for country in countries["countries"]:
-                    data = fetch_country_indicator(country, indicator)
-                    if data:
-                        save_data(data, country, indicator)
+            for country in region_lookup:
+                data = fetch_country_indicator(country, indicator)
+                if data:
+                    save_data(data, country, indicator, region_lookup)
                         
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Collect World Bank macroeconomic indicators")
+    parser.add_argument("--serial", action="store_true", help="fetch one country/indicator at a time")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent requests")
+    parser.add_argument("--rate", type=float, default=None, help="max requests per second")
+    parser.add_argument("--batch", type=int, default=20, help="countries per request")
+    args = parser.parse_args()
+    with instrumented_run("macroeconomic_data"):
+        main(not args.serial, args.workers, args.rate, args.batch)
@@ -1,13 +1,63 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import yaml
 import pandas as pd
 from pathlib import Path
 import time
 from datetime import datetime, timedelta
 from urllib.parse import quote_plus
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+import sys
+
+sys.path.append(str(Path(__file__).parent.parent))
+from data_collection.news_dedup import NewsDedupIndex
+from instrumentation import timed, count, instrumented_run
 
 CONFIG_PATH = Path(__file__).parent.parent.parent / "config"
 DATA_PATH = Path(__file__).parent.parent.parent / "data/raw/news"
+NEWSAPI_URL = "https://newsapi.org/v2"
+GDELT_URL = "https://api.gdeltproject.org/api/v2"
+# NewsAPI error codes that mean the key cannot be used again today
+NEWSAPI_QUOTA_CODES = {"rateLimited", "apiKeyExhausted", "maximumResultsReached"}
+
+
+class QuotaExceeded(Exception):
+    """Raised when NewsAPI reports the request quota is used up"""
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`"""
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def build_session(pool_size: int = 4, retries: int = 3, backoff: float = 1.0) -> requests.Session:
+    """Pooled session retrying server errors; 429s are left to the caller"""
+    retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=(500, 502, 503, 504),
+                  allowed_methods=frozenset(["GET"]))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
 
 def load_news_config():
     """Load countries and keywords from config"""
@@ -23,26 +73,80 @@ def build_newsapi_query(country: str, keywords: list) -> str:
     base_query = f'("{country}" OR "{country} economy") AND ('
     return base_query + " OR ".join([f'"{kw}"' for kw in keywords]) + ")"
 
-def fetch_newsapi_articles(country: str, keywords: list, api_key: str):
-    """Fetch articles from NewsAPI for a country"""
+@timed("news.fetch_newsapi_articles")
+def fetch_newsapi_articles(country: str, keywords: list, api_key: str, session: requests.Session = None,
+                           since: pd.Timestamp = None, base_url: str = NEWSAPI_URL):
+    """Fetch articles from NewsAPI for a country.
+
+    `since` restricts results to articles published at or after it.
+    Raises QuotaExceeded when the key is rate limited or exhausted.
+    """
     query = build_newsapi_query(country, keywords)
-    url = f"https://newsapi.org/v2/everything?q={quote_plus(query)}&language=en&sortBy=publishedAt&pageSize=100&apiKey={api_key}"
+    url = f"{base_url}/everything?q={quote_plus(query)}&language=en&sortBy=publishedAt&pageSize=100&apiKey={api_key}"
     # Avoid fetching same articules using publishedAt filtering
-    # url += f"&from={datetime.now() - timedelta(days=1)}"
+    if since is not None:
+        url += f"&from={since.strftime('%Y-%m-%dT%H:%M:%S')}"
+    http = session or requests
     try:
-        response = requests.get(url, timeout=10)
+        response = http.get(url, timeout=10)
+        if response.status_code == 429:
+            raise QuotaExceeded(f"HTTP 429 for {country}")
+        if not response.ok:
+            code = response.json().get('code') if 'json' in response.headers.get('Content-Type', '') else None
+            if code in NEWSAPI_QUOTA_CODES:
+                raise QuotaExceeded(f"{code} for {country}")
         response.raise_for_status()
         return response.json().get('articles', [])
+    except QuotaExceeded:
+        count("news.newsapi_quota_exceeded")
+        raise
     except Exception as e:
+        count("news.fetch_errors")
         print(f"NewsAPI error for {country}: {str(e)}")
         return []
 
-def save_articles(articles: list, country: str, region: str):
-    """Save articles to region/country folder"""
+def country_folder(country: str, region: str) -> Path:
+    return DATA_PATH / region.replace(" ", "_") / country.replace(" ", "_")
+
+def last_published_at(country: str, region: str, dedup_index: NewsDedupIndex = None):
+    """Most recent stored publishedAt for a country, or None.
+
+    Read from the dedup index's high-water mark; stored files are only scanned
+    when the index has none for the country yet (indexes created before it
+    was tracked), and the result is recorded there.
+    """
+    if dedup_index is not None:
+        latest = dedup_index.latest_published(country)
+        if latest is not None:
+            return latest
+    latest = None
+    for file in country_folder(country, region).glob("*.parquet"):
+        try:
+            published = pd.to_datetime(pd.read_parquet(file, columns=['publishedAt'])['publishedAt'],
+                                       utc=True, errors='coerce').max()
+        except Exception:
+            continue
+        if pd.notna(published) and (latest is None or published > latest):
+            latest = published
+    if dedup_index is not None:
+        dedup_index.update_latest(country, latest)
+    return latest
+
+def save_articles(articles: list, country: str, region: str, dedup_index: NewsDedupIndex = None) -> int:
+    """Save articles to region/country folder, skipping ones already stored on any day.
+
+    Returns the number of articles actually added.
+    """
+    if dedup_index is not None:
+        fetched = len(articles)
+        articles = dedup_index.filter_new(country, articles)
+        count("news.duplicates_skipped", fetched - len(articles))
+        if fetched and not articles:
+            print(f"No new articles for {country} ({fetched} already stored)")
     if not articles:
-        return
+        return 0
     
-    region_folder = DATA_PATH / region.replace(" ", "_") / country.replace(" ", "_")
+    region_folder = country_folder(country, region)
     region_folder.mkdir(parents=True, exist_ok=True)
     
     filename = f"{datetime.now().strftime('%Y%m%d')}.parquet"
@@ -54,36 +158,116 @@ def save_articles(articles: list, country: str, region: str):
         'url': a.get('url'),
         'content': a.get('content')[:2000] if a.get('content') else None  # Truncate for storage
     } for a in articles])
+
+    # A second run on the same day adds to that day's file instead of replacing it
+    existing_count = 0
+    if (region_folder / filename).exists():
+        existing = pd.read_parquet(region_folder / filename)
+        existing_count = len(existing)
+        df = pd.concat([existing, df], ignore_index=True).drop_duplicates('url', keep='last')
     
     df.to_parquet(region_folder / filename)
-    print(f"Saved {len(df)} articles for {country}")
+    if dedup_index is not None:
+        dedup_index.add(country, articles)
+    saved = len(df) - existing_count
+    print(f"Saved {saved} articles for {country}")
+    return saved
+
 
+@timed("news.fetch_gdelt_articles")
+def fetch_gdelt_articles(country: str, keywords: list, session: requests.Session = None,
+                         since: pd.Timestamp = None, base_url: str = GDELT_URL):
+    """Fallback to GDELT if NewsAPI limits are hit.
 
-def fetch_gdelt_articles(country: str, keywords: list):
-    """Fallback to GDELT if NewsAPI limits are hit"""
-    query = quote_plus(f'({country}) ({") (".join(keywords)})')
-    url = f"https://api.gdeltproject.org/api/v2/doc/doc?query={query}&mode=artlist&format=json"
+    Articles are returned in NewsAPI's shape so save_articles can store them.
+    """
+    # GDELT wants OR'ed terms wrapped in parentheses
+    terms = " OR ".join(f'"{kw}"' for kw in keywords)
+    query = quote_plus(f'"{country}" ({terms})')
+    url = f"{base_url}/doc/doc?query={query}&mode=artlist&format=json&maxrecords=250&sort=datedesc"
+    if since is not None:
+        url += f"&startdatetime={since.strftime('%Y%m%d%H%M%S')}"
+    http = session or requests
     
     try:
-        response = requests.get(url, timeout=15)
-        return response.json().get('articles', [])
+        response = http.get(url, timeout=15)
+        response.raise_for_status()
+        articles = response.json().get('articles', [])
     except Exception as e:
+        count("news.fetch_errors")
         print(f"GDELT error: {str(e)}")
         return []
 
+    return [{
+        'title': a.get('title'),
+        'description': None,
+        'publishedAt': pd.to_datetime(a.get('seendate'), format='%Y%m%dT%H%M%SZ', utc=True)
+            .strftime('%Y-%m-%dT%H:%M:%SZ') if a.get('seendate') else None,
+        'source': {'name': a.get('domain')},
+        'url': a.get('url'),
+        # GDELT has no article body; the title is the only text to score
+        'content': a.get('title'),
+    } for a in articles]
+
 from bs4 import BeautifulSoup
 
 
-def main():
+def collect_news(max_workers: int = 4, newsapi_rate: float = 1 / 3, gdelt_rate: float = 0.2,
+                 newsapi_url: str = NEWSAPI_URL, gdelt_url: str = GDELT_URL, api_key: str = None) -> dict:
+    """Fetch news for all countries concurrently.
+
+    Each provider has its own token bucket shared by all workers. Once NewsAPI
+    reports its quota is exhausted, the remaining countries (including the
+    one that hit the limit) are fetched from GDELT. Only articles newer than
+    the last stored publishedAt (kept in the dedup index) are requested. Returns {country: n_saved},
+    the number of new articles stored after removing duplicates.
+    """
     config = load_news_config()
-    api_key = load_api_key('newsapi')
-    
-    for region, countries in config['countries'].items():
-        for country in countries:
-            print(f"Fetching news for {country}...")
-            articles = fetch_newsapi_articles(country, config['news_keywords'], api_key)
-            save_articles(articles, country, region)
-            time.sleep(3)  # NewsAPI free tier: 100 req/day (~3s between calls)
+    api_key = api_key or load_api_key('newsapi')
+    keywords = config['news_keywords']
+
+    newsapi_bucket = TokenBucket(newsapi_rate)
+    gdelt_bucket = TokenBucket(gdelt_rate)
+    quota_exhausted = threading.Event()
+    session = build_session(pool_size=max_workers)
+    dedup_index = NewsDedupIndex(news_path=DATA_PATH)
+
+    def task(country, region):
+        last = last_published_at(country, region, dedup_index)
+        # Both APIs treat the start as inclusive, so start just after the last stored article
+        since = last + pd.Timedelta(seconds=1) if last is not None else None
+        articles = None
+        if not quota_exhausted.is_set():
+            newsapi_bucket.acquire()
+            try:
+                articles = fetch_newsapi_articles(country, keywords, api_key, session, since, newsapi_url)
+            except QuotaExceeded as e:
+                print(f"NewsAPI quota exhausted ({e}), falling back to GDELT")
+                quota_exhausted.set()
+        if articles is None:
+            gdelt_bucket.acquire()
+            articles = fetch_gdelt_articles(country, keywords, session, since, gdelt_url)
+        return country, save_articles(articles, country, region, dedup_index)
+
+    counts = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(task, country, region)
+            for region, countries in config['countries'].items()
+            for country in countries
+        ]
+        for future in as_completed(futures):
+            country, n = future.result()
+            counts[country] = n
+    session.close()
+    return counts
+
+
+def main():
+    print("Fetching news for all countries...")
+    counts = collect_news()
+    print(f"Fetched {sum(counts.values())} new articles for {len(counts)} countries")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with instrumented_run("news_collector"):
+        main()
\ No newline at end of file
@@ -0,0 +1,136 @@
+import pandas as pd
+from pathlib import Path
+import hashlib
+import re
+import sqlite3
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+INDEX_FILE = PROJECT_ROOT / "data/cache/news_dedup.sqlite"
+NEWS_PATH = PROJECT_ROOT / "data/raw/news"
+# Seconds to wait on a lock held by another collector thread
+LOCK_TIMEOUT = 60
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def normalize_title(title) -> str:
+    """Lowercase alphanumeric words only, so punctuation and spacing variants match"""
+    if not isinstance(title, str):
+        return ""
+    words = re.sub(r"[^0-9a-z]+", " ", title.lower()).split()
+    # NewsAPI blanks out removed articles with this placeholder title
+    return "" if words == ["removed"] else " ".join(words)
+
+
+def article_hashes(url, title) -> list:
+    """(kind, hash) keys identifying an article: its URL and its normalized title"""
+    keys = []
+    if isinstance(url, str) and url:
+        keys.append(("url", _hash(url.strip())))
+    normalized = normalize_title(title)
+    if normalized:
+        keys.append(("title", _hash(normalized)))
+    return keys
+
+
+def _latest_published(articles: list):
+    """Latest publishedAt among `articles` as a UTC ISO string, or None"""
+    published = pd.to_datetime(pd.Series([a.get("publishedAt") for a in articles], dtype=object),
+                               utc=True, errors="coerce").max()
+    return None if pd.isna(published) else published.strftime(TIMESTAMP_FORMAT)
+
+
+class NewsDedupIndex:
+    """Persistent index of stored articles per country, keyed by URL and title hashes.
+
+    A new index is backfilled from the articles already under raw/news, so
+    articles saved before the index existed are not stored again. The index
+    also keeps each country's latest stored publishedAt, the collector's
+    incremental cursor.
+    """
+    def __init__(self, path: Path = INDEX_FILE, news_path: Path = NEWS_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        is_new = not self.path.exists()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS seen ("
+                " country TEXT NOT NULL, kind TEXT NOT NULL, hash TEXT NOT NULL,"
+                " PRIMARY KEY (country, kind, hash))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS latest ("
+                " country TEXT PRIMARY KEY, published_at TEXT NOT NULL)"
+            )
+        if is_new:
+            self.backfill(news_path)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=LOCK_TIMEOUT)
+
+    def backfill(self, news_path: Path):
+        """Index every article already stored under `news_path`"""
+        for file in Path(news_path).rglob("*.parquet"):
+            try:
+                df = pd.read_parquet(file, columns=["url", "title", "publishedAt"])
+            except Exception as e:
+                print(f"Error indexing {file}: {str(e)}")
+                continue
+            self.add(file.parent.name.replace("_", " "), df.to_dict("records"))
+
+    def filter_new(self, country: str, articles: list) -> list:
+        """Articles not stored before, and not duplicated within `articles` itself"""
+        keys = [article_hashes(a.get("url"), a.get("title")) for a in articles]
+        all_hashes = {h for article_keys in keys for _, h in article_keys}
+        if not all_hashes:
+            return list(articles)
+
+        with self._connect() as conn:
+            conn.execute("CREATE TEMP TABLE wanted (hash TEXT)")
+            conn.executemany("INSERT INTO wanted VALUES (?)", ((h,) for h in all_hashes))
+            seen = set(conn.execute(
+                "SELECT s.kind, s.hash FROM seen s JOIN wanted w ON s.hash = w.hash WHERE s.country = ?",
+                (country,)
+            ).fetchall())
+
+        new = []
+        for article, article_keys in zip(articles, keys):
+            if any(key in seen for key in article_keys):
+                continue
+            seen.update(article_keys)
+            new.append(article)
+        return new
+
+    def add(self, country: str, articles: list):
+        """Record articles as stored"""
+        rows = [
+            (country, kind, h)
+            for a in articles
+            for kind, h in article_hashes(a.get("url"), a.get("title"))
+        ]
+        with self._connect() as conn:
+            conn.executemany("INSERT OR IGNORE INTO seen (country, kind, hash) VALUES (?, ?, ?)", rows)
+        self.update_latest(country, _latest_published(articles))
+
+    def update_latest(self, country: str, published_at):
+        """Move the country's latest stored publishedAt forward to `published_at`"""
+        if published_at is None:
+            return
+        published_at = pd.Timestamp(published_at)
+        published_at = published_at.tz_localize("UTC") if published_at.tz is None else published_at.tz_convert("UTC")
+        with self._connect() as conn:
+            # ISO strings in one format compare in time order
+            conn.execute(
+                "INSERT INTO latest (country, published_at) VALUES (?, ?)"
+                " ON CONFLICT(country) DO UPDATE SET published_at = max(published_at, excluded.published_at)",
+                (country, published_at.strftime(TIMESTAMP_FORMAT))
+            )
+
+    def latest_published(self, country: str):
+        """Latest stored publishedAt of a country as a UTC Timestamp, or None"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT published_at FROM latest WHERE country = ?", (country,)).fetchone()
+        return pd.Timestamp(row[0]) if row else None
@@ -0,0 +1,77 @@
+import pandas as pd
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+import yaml
+import sys
+
+sys.path.append(str(Path(__file__).parent.parent))
+from data_processing.fx_store import load_fx_prices
+from data_processing.fx_downsample import build_pyramid
+
+DATA_PATH = Path(__file__).parent.parent.parent / "data"
+CONFIG_PATH = Path(__file__).parent.parent.parent / "config"
+SLICES_PATH = DATA_PATH / "processed/dashboard"
+
+# Score columns shown on the dashboard's radar chart, in display order
+RADAR_SCORES = ['gdp_score', 'inflation_score', 'fx_score', 'drawdown_score', 'var_score', 'prophet_score',
+                'sentiment_score', 'debt_score', 'current_account_score']
+RECENT_NEWS_DAYS = 7
+
+
+def country_mapping() -> dict:
+    """Map news folder country names to country codes"""
+    with open(CONFIG_PATH / "countries_regions.yaml") as f:
+        return yaml.safe_load(f)['country_mapping']
+
+
+def load_recent_news(days: int = RECENT_NEWS_DAYS) -> pd.DataFrame:
+    """Articles published in the last `days` days, newest first, tagged with their country code"""
+    country_map = country_mapping()
+    dfs = []
+    for file in (DATA_PATH / "raw/news").rglob("*.parquet"):
+        df = pd.read_parquet(file)
+        df['country'] = country_map.get(file.parent.name.replace("_", " "), "UNKNOWN")
+        dfs.append(df)
+    if not dfs:
+        return pd.DataFrame(columns=['country', 'publishedAt'])
+    all_news = pd.concat(dfs, ignore_index=True)
+    all_news['publishedAt'] = pd.to_datetime(all_news['publishedAt'], utc=True, errors='coerce')
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    return all_news[all_news['publishedAt'] >= cutoff].sort_values('publishedAt', ascending=False)
+
+
+def slice_file(country: str, kind: str) -> Path:
+    """Precomputed per-country dashboard slice ('fx', 'news' or 'radar')"""
+    return SLICES_PATH / country / f"{kind}.parquet"
+
+
+def build_dashboard_slices(news_days: int = RECENT_NEWS_DAYS):
+    """Write the per-country FX pyramid, recent news and radar vector the dashboard reads.
+
+    Run after risk scores are computed, so a country selection on the dashboard
+    reads three small files instead of filtering every dataset.
+    """
+    risk = pd.read_parquet(DATA_PATH / "processed/risk_scores.parquet")
+    pairs = pd.read_parquet(DATA_PATH / "processed/fx_volatility.parquet", columns=['pair', 'country'])
+    pairs = pairs.dropna(subset=['country']).drop_duplicates('country').set_index('country')['pair']
+    fx = load_fx_prices(pairs=list(pairs), columns=['Close'])
+    fx_by_pair = dict(tuple(fx.groupby('pair')))
+    news = load_recent_news(news_days)
+    news_by_country = dict(tuple(news.groupby('country')))
+
+    for country in risk['country']:
+        folder = SLICES_PATH / country
+        folder.mkdir(parents=True, exist_ok=True)
+        risk.loc[risk['country'] == country, ['country'] + RADAR_SCORES].to_parquet(
+            slice_file(country, 'radar'), index=False
+        )
+        # FX history as a downsampling pyramid, so charts stay bounded as history grows
+        fx_slice = fx_by_pair.get(pairs.get(country), fx.iloc[:0])
+        build_pyramid(fx_slice).to_parquet(slice_file(country, 'fx'), index=False)
+        news_slice = news_by_country.get(country, news.iloc[:0])
+        news_slice.reset_index(drop=True).to_parquet(slice_file(country, 'news'), index=False)
+    print(f"Saved dashboard slices for {len(risk)} countries to {SLICES_PATH}")
+
+
+if __name__ == "__main__":
+    build_dashboard_slices()
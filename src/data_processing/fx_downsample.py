@@ -0,0 +1,71 @@
+import pandas as pd
+import numpy as np
+
+# Most points a chart is sent, whatever the length of history shown
+MAX_POINTS = 1000
+# Each pyramid level keeps roughly 1/LEVEL_FACTOR of the points of the level below
+LEVEL_FACTOR = 4
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the points kept by Largest-Triangle-Three-Buckets downsampling.
+
+    The first and last points are always kept; every bucket in between keeps
+    the point forming the largest triangle with the previously kept point and
+    the average of the next bucket, which preserves peaks and troughs.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    every = (n - 2) / (threshold - 2)
+    edges = np.floor(np.arange(threshold - 1) * every).astype(int) + 1
+    sizes = np.diff(edges)
+    # Bucket averages, with the last point standing in for the bucket after the final one
+    avg_x = np.append(np.add.reduceat(x[:n - 1], edges[:-1]) / sizes, x[-1])
+    avg_y = np.append(np.add.reduceat(y[:n - 1], edges[:-1]) / sizes, y[-1])
+
+    kept = np.empty(threshold, dtype=int)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - avg_x[i + 1]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y[i + 1] - y[a]))
+        a = lo + int(np.nanargmax(area)) if not np.isnan(area).all() else lo
+        kept[i + 1] = a
+    return kept
+
+
+def build_pyramid(series: pd.DataFrame, x: str = 'Date', y: str = 'Close',
+                  max_points: int = MAX_POINTS, factor: int = LEVEL_FACTOR) -> pd.DataFrame:
+    """Multi-resolution copies of a series, stacked with a 'level' column.
+
+    Level 0 is the full series; each further level is an LTTB reduction of the
+    full series to 1/`factor` of the previous level's points, down to a level
+    with at most `max_points` points.
+    """
+    series = series[[x, y]].dropna().sort_values(x).reset_index(drop=True)
+    x_values = series[x].to_numpy().astype('datetime64[ns]').astype('int64')
+    levels = [series.assign(level=0)]
+    size = len(series)
+    while size > max_points:
+        size = max(size // factor, max_points)
+        kept = lttb(x_values, series[y].to_numpy(), size)
+        levels.append(series.iloc[kept].assign(level=len(levels)))
+    return pd.concat(levels, ignore_index=True)
+
+
+def chart_points(pyramid: pd.DataFrame, start=None, end=None, x: str = 'Date',
+                 max_points: int = MAX_POINTS) -> pd.DataFrame:
+    """Finest pyramid level that shows the range [`start`, `end`] in at most `max_points` points"""
+    in_range = pd.Series(True, index=pyramid.index)
+    if start is not None:
+        in_range &= pyramid[x] >= pd.Timestamp(start)
+    if end is not None:
+        in_range &= pyramid[x] <= pd.Timestamp(end)
+    counts = pyramid.loc[in_range, 'level'].value_counts()
+    fitting = counts[counts <= max_points]
+    level = fitting.index.min() if not fitting.empty else pyramid['level'].max()
+    return pyramid[in_range & (pyramid['level'] == level)].drop(columns='level').reset_index(drop=True)
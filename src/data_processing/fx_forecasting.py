@@ -0,0 +1,252 @@
+import pandas as pd
+import numpy as np
+from statsmodels.tsa.arima.model import ARIMA
+from prophet import Prophet
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import hashlib
+import pickle
+import signal
+import time
+import os
+import sys
+import warnings
+warnings.filterwarnings("ignore")
+
+sys.path.append(str(Path(__file__).parent.parent))
+from instrumentation import record_time, count
+
+DATA_PATH = Path(__file__).parent.parent.parent / "data"
+CACHE_PATH = DATA_PATH / "cache/forecasts"
+FORECAST_STEPS = 30
+ARIMA_ORDER = (1, 1, 1)
+
+# Everything that changes a model's output besides the input series
+MODEL_PARAMS = {
+    'arima': {'order': ARIMA_ORDER, 'steps': FORECAST_STEPS},
+    'prophet': {'daily_seasonality': False, 'steps': FORECAST_STEPS},
+}
+# Trailing points of a fitted series that may still change, e.g. today's partial bar
+REVISABLE_POINTS = 1
+
+
+class FitTimeout(BaseException):
+    """Raised inside a worker when a single fit exceeds its time budget.
+
+    Derives from BaseException so the forecasters' own error handling does not
+    swallow it and the timeout can be reported separately from failures.
+    """
+
+
+def forecast_arima(series: pd.Series, start_params=None) -> tuple:
+    """ARIMA(1,1,1) forecast for next 30 days.
+
+    `start_params` warm-starts the optimizer from a previous fit. Returns
+    (forecast, fitted_params).
+    """
+    try:
+        model = ARIMA(series, order=ARIMA_ORDER)
+        model_fit = model.fit(start_params=start_params)
+        forecast = model_fit.forecast(steps=FORECAST_STEPS)
+        return forecast.mean(), np.asarray(model_fit.params)
+    except Exception:
+        if start_params is not None:
+            return forecast_arima(series)
+        return np.nan, None
+
+
+def forecast_prophet(series: pd.Series, start_params=None) -> tuple:
+    """Prophet forecast for next 30 days. Returns (forecast, None)."""
+    try:
+        df = pd.DataFrame({
+            'ds': series.index,
+            'y': series.values
+        })
+        model = Prophet(daily_seasonality=False)
+        model.fit(df)
+        future = model.make_future_dataframe(periods=FORECAST_STEPS)
+        forecast = model.predict(future)
+        return forecast.tail(FORECAST_STEPS)['yhat'].mean(), None
+    except Exception:
+        return np.nan, None
+
+
+FORECASTERS = {
+    'arima': forecast_arima,
+    'prophet': forecast_prophet,
+}
+
+
+def series_fingerprint(series: pd.Series) -> str:
+    """Hash of a series' dates and values"""
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(series.index.asi8).tobytes())
+    digest.update(np.ascontiguousarray(series.to_numpy(dtype=float)).tobytes())
+    return digest.hexdigest()
+
+
+class ForecastCache:
+    """On-disk cache of forecasts, one entry per pair and model.
+
+    An entry records the model parameters, the fingerprint and length of the
+    series it was fitted on, the forecast and the fitted model parameters.
+    A lookup returns the cached forecast when the series is unchanged, or the
+    previous fitted parameters to warm-start from when the series only gained
+    new points at the end. The last REVISABLE_POINTS of the fitted series are
+    left out of that comparison, since a re-downloaded partial bar changes them.
+    """
+    def __init__(self, path: Path = CACHE_PATH):
+        self.path = Path(path)
+
+    def _entry_file(self, pair: str, model: str) -> Path:
+        return self.path / f"{pair}_{model}.pkl"
+
+    def _read(self, pair: str, model: str):
+        file = self._entry_file(pair, model)
+        if not file.exists():
+            return None
+        try:
+            with open(file, "rb") as f:
+                entry = pickle.load(f)
+        except Exception:
+            return None
+        return entry if entry.get('params') == MODEL_PARAMS[model] else None
+
+    def lookup(self, pair: str, model: str, series: pd.Series) -> tuple:
+        """Return ('hit', forecast), ('extend', fitted_params) or ('miss', None)"""
+        entry = self._read(pair, model)
+        if entry is None:
+            return 'miss', None
+        if entry['length'] == len(series) and entry['fingerprint'] == series_fingerprint(series):
+            return 'hit', entry['forecast']
+        settled = entry['length'] - REVISABLE_POINTS
+        if (entry['length'] <= len(series) and entry['fitted_params'] is not None
+                and entry.get('prefix_fingerprint') == series_fingerprint(series.iloc[:settled])):
+            return 'extend', entry['fitted_params']
+        return 'miss', None
+
+    def store(self, pair: str, model: str, series: pd.Series, forecast: float, fitted_params):
+        self.path.mkdir(parents=True, exist_ok=True)
+        entry = {
+            'params': MODEL_PARAMS[model],
+            'fingerprint': series_fingerprint(series),
+            'prefix_fingerprint': series_fingerprint(series.iloc[:len(series) - REVISABLE_POINTS]),
+            'length': len(series),
+            'forecast': forecast,
+            'fitted_params': fitted_params,
+        }
+        with open(self._entry_file(pair, model), "wb") as f:
+            pickle.dump(entry, f)
+
+
+def _raise_timeout(signum, frame):
+    raise FitTimeout()
+
+
+def _timed_fit(pair: str, model: str, series: pd.Series, timeout: float = None,
+               start_params=None) -> dict:
+    """Run one forecast, enforcing `timeout` seconds where SIGALRM is available"""
+    use_alarm = bool(timeout) and hasattr(signal, "SIGALRM")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+
+    start = time.perf_counter()
+    status = 'ok' if start_params is None else 'warm'
+    fitted_params = None
+    try:
+        value, fitted_params = FORECASTERS[model](series, start_params)
+    except FitTimeout:
+        value = np.nan
+        status = 'timeout'
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+    if status != 'timeout' and np.isnan(value):
+        status = 'failed'
+    return {
+        'pair': pair,
+        'model': model,
+        'forecast': value,
+        'seconds': time.perf_counter() - start,
+        'status': status,
+        'fitted_params': fitted_params,
+    }
+
+
+def run_forecasts(vol_series: dict, models: tuple = ('arima', 'prophet'),
+                  max_workers: int = None, timeout: float = 300,
+                  cache: ForecastCache = None) -> tuple:
+    """Fit every model for every pair over a process pool.
+
+    `max_workers` defaults to the machine's core count; 1 runs in-process.
+    Failed or timed-out fits, including fits lost to a crashed worker, yield
+    NaN. With a `cache`, unchanged series reuse the stored forecast and
+    extended series warm-start from the previous fit.
+    Returns (forecasts, timings) where `forecasts` has one '<model>_forecast'
+    column per model indexed by pair and `timings` has one row per fit.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    results = []
+    tasks = []
+    for pair, series in vol_series.items():
+        for model in models:
+            if cache is None:
+                tasks.append((pair, model, series, timeout, None))
+                continue
+            start = time.perf_counter()
+            kind, value = cache.lookup(pair, model, series)
+            if kind == 'hit':
+                results.append({'pair': pair, 'model': model, 'forecast': value,
+                                'seconds': time.perf_counter() - start, 'status': 'cached'})
+            else:
+                tasks.append((pair, model, series, timeout, value))
+
+    if max_workers == 1 or len(tasks) <= 1:
+        fits = [_timed_fit(*task) for task in tasks]
+    else:
+        fits = []
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(tasks))) as executor:
+            submitted = time.perf_counter()
+            futures = {executor.submit(_timed_fit, *task): task for task in tasks}
+            for future in as_completed(futures):
+                try:
+                    fits.append(future.result())
+                except Exception as e:
+                    # A crashed worker (BrokenProcessPool) or an unpicklable result fails only this fit
+                    pair, model = futures[future][:2]
+                    print(f"Error fitting {model} for {pair}: {str(e)}")
+                    fits.append({'pair': pair, 'model': model, 'forecast': np.nan,
+                                 'seconds': time.perf_counter() - submitted, 'status': 'failed',
+                                 'fitted_params': None})
+
+    for fit in fits:
+        if cache is not None and fit['status'] in ('ok', 'warm'):
+            cache.store(fit['pair'], fit['model'], vol_series[fit['pair']], fit['forecast'], fit['fitted_params'])
+        # Fits may have run in pool workers, so their durations are recorded here
+        record_time(f"forecast.{fit['model']}", fit['seconds'])
+        results.append(fit)
+    for result in results:
+        count(f"forecast.{result['model']}.{result['status']}")
+
+    timings = pd.DataFrame(results, columns=['pair', 'model', 'forecast', 'seconds', 'status'])
+    forecasts = timings.pivot(index='pair', columns='model', values='forecast') \
+        .reindex(index=list(vol_series), columns=list(models)) \
+        .add_suffix('_forecast')
+    forecasts.columns.name = None
+    return forecasts, timings
+
+
+def summarize_timings(timings: pd.DataFrame) -> pd.DataFrame:
+    """Fit duration summary per model"""
+    return timings.groupby('model').agg(
+        fits=('seconds', 'count'),
+        total_s=('seconds', 'sum'),
+        mean_s=('seconds', 'mean'),
+        max_s=('seconds', 'max'),
+        cached=('status', lambda s: (s == 'cached').sum()),
+        warm_started=('status', lambda s: (s == 'warm').sum()),
+        failed=('status', lambda s: (s == 'failed').sum()),
+        timed_out=('status', lambda s: (s == 'timeout').sum()),
+    )
@@ -0,0 +1,86 @@
+import pandas as pd
+import numpy as np
+
+TRADING_DAYS = 252
+
+
+def _compact(values: np.ndarray, *others: np.ndarray) -> tuple:
+    """Push NaNs in each column to the top, keeping the order of valid values.
+
+    `others` are reordered the same way so they stay aligned with `values`.
+    """
+    order = np.argsort(~np.isnan(values), axis=0, kind='stable')
+    return tuple(np.take_along_axis(a, order, axis=0) for a in (values,) + others)
+
+
+def to_position_matrix(fx_data: pd.DataFrame, value_col: str = 'Close') -> tuple:
+    """Pivot long FX data into a (position x pair) matrix.
+
+    Each pair's observations are right-aligned so its last bar sits in the last
+    row, which makes every column behave exactly like the pair's own Series
+    under rolling windows even when pairs trade on different calendars.
+    Returns (values, dates, pairs) where `dates` is the matching datetime64
+    matrix (NaT where padded).
+    """
+    df = fx_data.reset_index()[['Date', 'pair', value_col]]
+    df = df.sort_values(['pair', 'Date'], kind='stable')
+    df['pos'] = df.groupby('pair').cumcount(ascending=False)
+    wide = df.pivot(index='pos', columns='pair')
+    wide = wide.sort_index(ascending=False)
+    values = wide[value_col].to_numpy(dtype=float)
+    dates = wide['Date'].to_numpy(dtype='datetime64[ns]')
+    return values, dates, list(wide[value_col].columns)
+
+
+def historical_var(returns: np.ndarray, var_confidence: float = 0.95) -> np.ndarray:
+    """Historical VaR per column of a compacted (NaNs on top) returns matrix.
+
+    Columns with the same number of observations share one np.percentile call,
+    which keeps results identical to calling np.percentile per pair.
+    """
+    counts = (~np.isnan(returns)).sum(axis=0)
+    var = np.full(returns.shape[1], np.nan)
+    for n in np.unique(counts[counts > 0]):
+        cols = np.flatnonzero(counts == n)
+        var[cols] = np.percentile(returns[-n:, cols], (1 - var_confidence) * 100, axis=0)
+    return var
+
+
+def compute_fx_metrics(prices: np.ndarray, dates: np.ndarray, pairs: list,
+                       window: int = 90, var_confidence: float = 0.95) -> tuple:
+    """Rolling volatility, rolling drawdown and historical VaR for all pairs at once.
+
+    Returns (metrics, vol) where `metrics` has one row per pair with the latest
+    volatility, drawdown and VaR, and `vol` is the right-aligned annualised
+    rolling volatility matrix with its dates, used as the forecasting input.
+    """
+    price_df = pd.DataFrame(prices, columns=pairs)
+
+    # Daily returns, dropping the NaN first return of each pair
+    returns, return_dates = _compact(price_df.pct_change().to_numpy(), dates)
+    return_df = pd.DataFrame(returns, columns=pairs)
+
+    vol = return_df.rolling(window).std().to_numpy() * np.sqrt(TRADING_DAYS)
+
+    rolling_max = price_df.rolling(window, min_periods=1).max()
+    drawdown = ((price_df - rolling_max) / rolling_max).rolling(window).mean()
+
+    var = historical_var(returns, var_confidence)
+
+    metrics = pd.DataFrame({
+        'pair': pairs,
+        'volatility': vol[-1],
+        'drawdown': drawdown.to_numpy()[-1],
+        'var': var,
+    })
+    return metrics, (vol, return_dates)
+
+
+def volatility_series(vol: tuple, pairs: list) -> dict:
+    """Split the volatility matrix back into one dated, NaN-free Series per pair"""
+    values, dates = vol
+    series = {}
+    for j, pair in enumerate(pairs):
+        mask = ~np.isnan(values[:, j])
+        series[pair] = pd.Series(values[mask, j], index=pd.DatetimeIndex(dates[mask, j], name='Date'))
+    return series
@@ -0,0 +1,99 @@
+import pandas as pd
+from pathlib import Path
+
+DATA_PATH = Path(__file__).parent.parent.parent / "data"
+RAW_FX_PATH = DATA_PATH / "raw/fx"
+STORE_PATH = DATA_PATH / "processed/fx_prices"
+
+
+def _raw_files_by_pair() -> dict:
+    """Group raw FX files (dated CSVs and per-pair Parquet stores) by pair"""
+    files = {}
+    for file in list(RAW_FX_PATH.rglob("*.csv")) + list(RAW_FX_PATH.rglob("*.parquet")):
+        pair = file.stem.split("_")[0]
+        files.setdefault(pair, []).append(file)
+    return files
+
+
+def partition_file(pair: str) -> Path:
+    """Consolidated store file of one pair"""
+    return STORE_PATH / f"pair={pair}" / "data.parquet"
+
+
+def _read_raw_file(file: Path) -> pd.DataFrame:
+    if file.suffix == ".parquet":
+        df = pd.read_parquet(file)
+    else:
+        df = pd.read_csv(file, parse_dates=['Date'], index_col='Date')
+    df.index = pd.to_datetime(df.index).tz_localize(None)
+    df.index.name = 'Date'
+    return df
+
+
+def _build_partition(pair: str, files: list):
+    """Merge every raw file of a pair into one de-duplicated partition"""
+    dfs = []
+    # Oldest first, so bars from newer downloads win on duplicate dates
+    for file in sorted(files, key=lambda f: f.stat().st_mtime):
+        try:
+            df = _read_raw_file(file)
+            df['region'] = file.parent.name
+            dfs.append(df)
+        except Exception as e:
+            print(f"Error processing {file.name}: {str(e)}")
+            continue
+    if not dfs:
+        return
+
+    combined = pd.concat(dfs)
+    combined = combined[~combined.index.duplicated(keep='last')].sort_index()
+    output = partition_file(pair)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    combined.reset_index().to_parquet(output, index=False)
+
+
+def consolidate_fx_store(force: bool = False) -> list:
+    """Rebuild partitions whose raw files changed since they were written.
+
+    Returns the list of pairs that were rebuilt.
+    """
+    rebuilt = []
+    for pair, files in _raw_files_by_pair().items():
+        output = partition_file(pair)
+        newest_raw = max(f.stat().st_mtime for f in files)
+        if force or not output.exists() or output.stat().st_mtime < newest_raw:
+            _build_partition(pair, files)
+            rebuilt.append(pair)
+    if rebuilt:
+        print(f"Consolidated FX store for {len(rebuilt)} pairs")
+    return rebuilt
+
+
+def load_fx_prices(pairs: list = None, columns: list = None, start=None, end=None,
+                   refresh: bool = False) -> pd.DataFrame:
+    """Load FX bars from the consolidated store.
+
+    Returns a long DataFrame with 'Date' and 'pair' columns plus the requested
+    `columns` (all columns when None). `pairs`, `start` and `end` are pushed
+    down to the Parquet reader so only matching partitions and row groups are read.
+    The store is kept up to date by the FX collector and processing stage;
+    `refresh` consolidates new raw files first.
+    """
+    if refresh:
+        consolidate_fx_store()
+    if not STORE_PATH.exists():
+        return pd.DataFrame(columns=['Date', 'pair'] + (columns or []))
+
+    filters = []
+    if pairs is not None:
+        filters.append(('pair', 'in', list(pairs)))
+    if start is not None:
+        filters.append(('Date', '>=', pd.Timestamp(start)))
+    if end is not None:
+        filters.append(('Date', '<=', pd.Timestamp(end)))
+    if columns is not None:
+        columns = ['Date', 'pair'] + [c for c in columns if c not in ('Date', 'pair')]
+
+    df = pd.read_parquet(STORE_PATH, columns=columns, filters=filters or None)
+    df['pair'] = df['pair'].astype(str)
+    return df.sort_values(['pair', 'Date']).reset_index(drop=True)
@@ -0,0 +1,88 @@
+import pandas as pd
+import numpy as np
+from pathlib import Path
+
+DATA_PATH = Path(__file__).parent.parent.parent / "data"
+PANEL_PATH = DATA_PATH / "processed/macro_panel.parquet"
+
+# World Bank indicator codes with the friendly names used across the project
+INDICATOR_NAMES = {
+    'NY.GDP.MKTP.KD.ZG': 'gdp_growth',
+    'FP.CPI.TOTL.ZG': 'inflation',
+    'GC.DOD.TOTL.GD.ZS': 'debt_to_gdp',
+    'BN.CAB.XOKA.GD.ZS': 'current_account'
+}
+AVERAGE_WINDOWS = (3, 5)
+
+
+def build_macro_panel(facts: pd.DataFrame, output_path: Path = PANEL_PATH) -> pd.DataFrame:
+    """Build the country x indicator x year panel with derived trend features.
+
+    Every series is laid out on a shared, gap-free year axis as one row of a
+    matrix, so year-over-year changes and trailing multi-year averages are
+    computed for all series at once. Missing years stay NaN and do not count
+    towards an average.
+    """
+    facts = facts.dropna(subset=['year']).copy()
+    facts['year'] = facts['year'].astype(int)
+    facts['value'] = pd.to_numeric(facts['value'], errors='coerce')
+
+    # Facts are unique per country/indicator/year, so this is a plain reshape
+    wide = facts.set_index(['country', 'region', 'indicator', 'year'])['value'].unstack('year')
+    years = np.arange(facts['year'].min(), facts['year'].max() + 1)
+    wide = wide.reindex(columns=years)
+    values = wide.to_numpy(dtype=float)
+
+    yoy = np.full_like(values, np.nan)
+    yoy[:, 1:] = values[:, 1:] - values[:, :-1]
+    features = {'value': values, 'yoy_change': yoy}
+    for window in AVERAGE_WINDOWS:
+        # Rolling along the year axis of the transposed matrix covers every series in one call
+        features[f'avg_{window}y'] = pd.DataFrame(values.T).rolling(window, min_periods=1).mean().to_numpy().T
+
+    keys = wide.index.to_frame(index=False)
+    panel = keys.loc[keys.index.repeat(len(years))].reset_index(drop=True)
+    panel['year'] = np.tile(years, len(wide))
+    for name, matrix in features.items():
+        panel[name] = matrix.ravel()
+    # Keep every year where the value or any of its rolling averages is known
+    panel = panel.dropna(subset=['value'] + [f'avg_{window}y' for window in AVERAGE_WINDOWS], how='all')
+    panel.insert(3, 'indicator_name', panel['indicator'].map(INDICATOR_NAMES).fillna(panel['indicator']))
+    panel = panel.sort_values(['country', 'indicator', 'year']).reset_index(drop=True)
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    panel.to_parquet(output_path, index=False, row_group_size=10000)
+    return panel
+
+
+def macro_history(countries: list = None, indicators: list = None, start: int = None, end: int = None,
+                  columns: list = None, path: Path = PANEL_PATH) -> pd.DataFrame:
+    """Slice of the macro panel.
+
+    `indicators` accepts World Bank codes or friendly names; the filters are
+    pushed down to the Parquet reader. Returns rows indexed by
+    (country, indicator_name, year).
+    """
+    filters = []
+    if countries is not None:
+        filters.append(('country', 'in', list(countries)))
+    if indicators is not None:
+        codes = {code for code, name in INDICATOR_NAMES.items() if name in indicators}
+        filters.append(('indicator', 'in', sorted(codes | set(indicators))))
+    if start is not None:
+        filters.append(('year', '>=', start))
+    if end is not None:
+        filters.append(('year', '<=', end))
+    if columns is not None:
+        columns = ['country', 'indicator_name', 'year'] + [
+            c for c in columns if c not in ('country', 'indicator_name', 'year')
+        ]
+
+    history = pd.read_parquet(path, columns=columns, filters=filters or None)
+    return history.set_index(['country', 'indicator_name', 'year']).sort_index()
+
+
+def indicator_series(indicator: str, feature: str = 'value', **kwargs) -> pd.DataFrame:
+    """One indicator feature as a year x country table, e.g. for trend charts"""
+    history = macro_history(indicators=[indicator], columns=[feature], **kwargs)
+    return history[feature].droplevel('indicator_name').unstack('country')
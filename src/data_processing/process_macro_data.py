@@ -1,86 +1,178 @@
 import json
+import hashlib
 import pandas as pd
 from pathlib import Path
 import yaml
+import sys
+
+sys.path.append(str(Path(__file__).parent.parent))
+from data_processing.macro_panel import build_macro_panel, INDICATOR_NAMES
+from instrumentation import timed, count, instrumented_run
 
 DATA_PATH = Path(__file__).parent.parent.parent / "data"
 CONFIG_PATH = Path(__file__).parent.parent.parent / "config"
 
+FACT_COLUMNS = ['country', 'region', 'indicator', 'year', 'value', 'source_file']
+MANIFEST_COLUMNS = ['path', 'mtime', 'sha1']
+
 def load_country_mapping() -> dict:
     """Map World Bank country codes to country names"""
     with open(CONFIG_PATH / "countries_regions.yaml") as f:
         return yaml.safe_load(f)['regions']
 
+def load_region_lookup() -> dict:
+    """Map each World Bank country code to its region"""
+    return {
+        country: region
+        for region, countries in load_country_mapping().items()
+        for country in countries['countries']
+    }
+
+@timed("macro.parse_json_file")
 def parse_json_file(file_path: Path) -> pd.DataFrame:
     """Parse a single World Bank JSON file"""
     with open(file_path) as f:
         data = json.load(f)
-    
+
     if len(data) < 2 or not data[1]:
         return pd.DataFrame()
-    
-    return pd.DataFrame([{
-        'country': item['countryiso3code'],
-        'indicator': item['indicator']['id'],
-        'year': item['date'],
-        'value': item['value']
-    } for item in data[1]])
-
-def process_macro_data():
-    """Process all raw macroeconomic files into a structured format using the most recent value for each indicator."""
-    raw_files = (DATA_PATH / "raw/macroeconomic").rglob("*.json")
-    country_regions = load_country_mapping()
-    
-    all_data = []
+
+    records = pd.DataFrame(data[1])
+    return pd.DataFrame({
+        'country': records['countryiso3code'],
+        'indicator': records['indicator'].str['id'],
+        'year': records['date'],
+        'value': records['value']
+    })
+
+def _file_sha1(file_path: Path) -> str:
+    return hashlib.sha1(file_path.read_bytes()).hexdigest()
+
+def _load_parquet(path: Path, columns: list) -> pd.DataFrame:
+    return pd.read_parquet(path) if path.exists() else pd.DataFrame(columns=columns)
+
+def _changed_files(raw_files: list, manifest: pd.DataFrame) -> tuple:
+    """Files that are new or whose content changed, plus the manifest entries to keep.
+
+    A matching mtime skips the file without reading it; a different mtime with
+    an unchanged hash only refreshes the manifest entry. Changed files are
+    returned as (file, entry) pairs and keep their previous entry, if any,
+    until the caller has ingested them and stores the new one.
+    """
+    known = manifest.set_index('path')
+    changed = []
+    entries = {}
     for file in raw_files:
+        key = file.relative_to(DATA_PATH).as_posix()
+        mtime = file.stat().st_mtime
+        if key in known.index and known.at[key, 'mtime'] == mtime:
+            entries[key] = (key, mtime, known.at[key, 'sha1'])
+            continue
+        sha1 = _file_sha1(file)
+        if key in known.index and known.at[key, 'sha1'] == sha1:
+            entries[key] = (key, mtime, sha1)
+            continue
+        changed.append((file, (key, mtime, sha1)))
+        if key in known.index:
+            entries[key] = (key, known.at[key, 'mtime'], known.at[key, 'sha1'])
+    return changed, entries
+
+def ingest_new_files(full_refresh: bool = False) -> tuple:
+    """Append observations from new or changed raw files to the macro fact table.
+
+    The fact table holds one row per country/indicator/year, taken from the most
+    recently collected file that contains it. Returns (facts, affected) where
+    `affected` is the set of (country, indicator) pairs touched by this run.
+    """
+    fact_path = DATA_PATH / "processed/macro_facts.parquet"
+    manifest_path = DATA_PATH / "processed/macro_manifest.parquet"
+    facts = pd.DataFrame(columns=FACT_COLUMNS) if full_refresh else _load_parquet(fact_path, FACT_COLUMNS)
+    manifest = pd.DataFrame(columns=MANIFEST_COLUMNS) if full_refresh else _load_parquet(manifest_path, MANIFEST_COLUMNS)
+
+    # Oldest first, so observations from newer downloads replace older ones
+    raw_files = sorted((DATA_PATH / "raw/macroeconomic").rglob("*.json"), key=lambda f: f.stat().st_mtime)
+    changed, entries = _changed_files(raw_files, manifest)
+    count("macro.files_parsed", len(changed))
+    count("macro.files_skipped", len(raw_files) - len(changed))
+    print(f"{len(changed)} of {len(raw_files)} macro files are new or changed")
+
+    region_lookup = load_region_lookup()
+    new_data = []
+    for file, entry in changed:
         try:
             df = parse_json_file(file)
             if not df.empty:
                 # Determine region using the country mapping
-                region = next(
-                    (r for r, countries in country_regions.items() 
-                     if df.iloc[0]['country'] in countries['countries']),
-                    None
-                )
+                region = region_lookup.get(df.iloc[0]['country'])
                 if region is None:
                     print(f"Region not found for country {df.iloc[0]['country']} in file {file.name}")
                     continue
                 df['region'] = region
-                all_data.append(df)
+                df['source_file'] = file.relative_to(DATA_PATH).as_posix()
+                new_data.append(df)
         except Exception as e:
             print(f"Error processing {file.name}: {str(e)}")
             continue
-    
-    if not all_data:
+        # Only ingested files are marked as processed; failed ones are retried next run
+        entries[entry[0]] = entry
+    manifest = pd.DataFrame(list(entries.values()), columns=MANIFEST_COLUMNS)
+
+    affected = set()
+    if new_data:
+        new_facts = pd.concat(new_data, ignore_index=True)
+        # Convert 'year' to numeric so sorting works as expected
+        new_facts['year'] = pd.to_numeric(new_facts['year'], errors='coerce')
+        affected = set(zip(new_facts['country'], new_facts['indicator']))
+        facts = pd.concat([df for df in (facts, new_facts) if not df.empty], ignore_index=True)
+        facts = facts.drop_duplicates(['country', 'indicator', 'year'], keep='last').reset_index(drop=True)
+
+    fact_path.parent.mkdir(parents=True, exist_ok=True)
+    facts.to_parquet(fact_path)
+    manifest.to_parquet(manifest_path)
+    return facts, affected
+
+def latest_values(facts: pd.DataFrame) -> pd.DataFrame:
+    """Most recent non-null value for each country-region-indicator"""
+    valid = facts.dropna(subset=['value']).sort_values('year', ascending=False)
+    return valid.groupby(['country', 'region', 'indicator'], as_index=False).first()[
+        ['country', 'region', 'indicator', 'year', 'value']
+    ]
+
+def process_macro_data(full_refresh: bool = False):
+    """Process raw macroeconomic files into a structured format using the most recent value for each indicator.
+
+    Only files that are new or changed since the last run are parsed, and
+    latest values are recomputed only for the country/indicator pairs they touch.
+    """
+    facts, affected = ingest_new_files(full_refresh)
+    if facts.empty:
         print("No data processed.")
         return
 
-    # Combine all raw data into one DataFrame
-    combined = pd.concat(all_data, ignore_index=True)
-    
-    # Convert 'year' to numeric so sorting works as expected
-    combined['year'] = pd.to_numeric(combined['year'], errors='coerce')
-    
-    # Sort descending by year so that the most recent records appear first
-    combined.sort_values('year', ascending=False, inplace=True)
-    
-    # Optionally drop rows with missing values; this ensures we only consider valid indicator values.
-    combined = combined.dropna(subset=['value'])
-    
-    # For each country-region-indicator, keep only the first record (i.e. the most recent)
-    latest = combined.groupby(['country', 'region', 'indicator'], as_index=False).first()
-    
+    latest_path = DATA_PATH / "processed/macro_latest.parquet"
+    latest = pd.DataFrame() if full_refresh else _load_parquet(latest_path, [])
+    if latest.empty:
+        latest = latest_values(facts)
+    elif affected:
+        keys = pd.MultiIndex.from_frame(facts[['country', 'indicator']])
+        touched = keys.isin(list(affected))
+        latest_keys = pd.MultiIndex.from_frame(latest[['country', 'indicator']])
+        latest = pd.concat([
+            latest[~latest_keys.isin(list(affected))],
+            latest_values(facts[touched]),
+        ], ignore_index=True)
+    latest.to_parquet(latest_path)
+
+    # Full history with trend features, rebuilt only when observations changed
+    if affected or not (DATA_PATH / "processed/macro_panel.parquet").exists():
+        build_macro_panel(facts, DATA_PATH / "processed/macro_panel.parquet")
+
     # Pivot the table to have one row per country with each indicator as a separate column
     processed = latest.pivot(index=['country', 'region'], columns='indicator', values='value').reset_index()
-    
+
     # Rename columns using World Bank indicator codes to more friendly names
-    processed = processed.rename(columns={
-        'NY.GDP.MKTP.KD.ZG': 'gdp_growth',
-        'FP.CPI.TOTL.ZG': 'inflation',
-        'GC.DOD.TOTL.GD.ZS': 'debt_to_gdp',
-        'BN.CAB.XOKA.GD.ZS': 'current_account'
-    })
-    
+    processed = processed.rename(columns=INDICATOR_NAMES)
+
     # Save the processed data to the output directory
     output_path = DATA_PATH / "processed/macro_indicators.parquet"
     output_path.parent.mkdir(parents=True, exist_ok=True)
@@ -88,4 +180,5 @@ def process_macro_data():
     print(f"Saved processed data to {output_path}")
 
 if __name__ == "__main__":
-    process_macro_data()
+    with instrumented_run("process_macro_data"):
+        process_macro_data()
@@ -2,42 +2,106 @@ import pandas as pd
 import yaml
 from pathlib import Path
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from transformers import pipeline
 import numpy as np
+import pyarrow.parquet as pq
+import time
+import sys
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(str(Path(__file__).parent.parent))
+from data_processing.sentiment_cache import SentimentScoreStore
+from instrumentation import METRICS, timed, count, instrumented_run
+from data_processing.sentiment_rollups import (
+    article_dates, rollup_articles, combine_rollups, load_file_rollups, daily_rollups, window_summary
+)
 
 PROJECT_ROOT = Path(__file__).parent.parent.parent 
 
 DATA_PATH = PROJECT_ROOT / "data"
 CONFIG_PATH = PROJECT_ROOT / "config"
+HF_MODEL = "finiteautomata/bertweet-base-sentiment-analysis"
+
+MODEL_VARIANTS = ("default", "quantized", "onnx")
+# Only the columns scoring and aggregation need; titles etc. are never read
+NEWS_COLUMNS = ["url", "content", "publishedAt"]
 
 class NewsSentimentProcessor:
-    def __init__(self):
+    def __init__(self, batch_size: int = 32, use_cache: bool = True, model_variant: str = "default",
+                 torch_threads: int = None, chunk_rows: int = 1000):
+        if model_variant not in MODEL_VARIANTS:
+            raise ValueError(f"model_variant must be one of {MODEL_VARIANTS}")
+        self.batch_size = batch_size
+        self.model_variant = model_variant
+        self.torch_threads = torch_threads
+        self.chunk_rows = chunk_rows
+        self.model_name = f"vader+{HF_MODEL}" + ("" if model_variant == "default" else f"@{model_variant}")
+        self.score_store = SentimentScoreStore() if use_cache else None
         self.analyzer = SentimentIntensityAnalyzer()
-        self.hf_pipeline = pipeline("sentiment-analysis", 
-                                   model="finiteautomata/bertweet-base-sentiment-analysis")
+        self._hf_pipeline = None
         self.country_map = self._load_country_mapping()
+
+    @property
+    def hf_pipeline(self):
+        """Hugging Face pipeline, built on first use so VADER-only runs skip torch entirely"""
+        if self._hf_pipeline is None:
+            start = time.perf_counter()
+            self._hf_pipeline = self._build_hf_pipeline()
+            print(f"Loaded {HF_MODEL} ({self.model_variant}) in {time.perf_counter() - start:.1f}s")
+        return self._hf_pipeline
+
+    def _build_hf_pipeline(self):
+        from transformers import pipeline, AutoTokenizer
+        if self.torch_threads:
+            import torch
+            torch.set_num_threads(self.torch_threads)
+
+        if self.model_variant == "default":
+            return pipeline("sentiment-analysis", model=HF_MODEL)
+
+        tokenizer = AutoTokenizer.from_pretrained(HF_MODEL)
+        if self.model_variant == "onnx":
+            try:
+                from optimum.onnxruntime import ORTModelForSequenceClassification
+            except ImportError as e:
+                raise ImportError("The onnx model variant requires `pip install optimum[onnxruntime]`") from e
+            model = ORTModelForSequenceClassification.from_pretrained(HF_MODEL, export=True)
+        else:
+            import torch
+            from transformers import AutoModelForSequenceClassification
+            model = AutoModelForSequenceClassification.from_pretrained(HF_MODEL)
+            # int8 dynamic quantization of the linear layers for CPU inference
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return pipeline("sentiment-analysis", model=model, tokenizer=tokenizer)
     
     def _load_country_mapping(self):
         with open(CONFIG_PATH / "countries_regions.yaml") as f:
             return yaml.safe_load(f)['country_mapping']
 
-    def _load_raw_news(self) -> pd.DataFrame:
-        """Load all raw news articles"""
-        news_files = (DATA_PATH / "raw/news").rglob("*.parquet")
-        dfs = []
-        
+    def _news_files(self) -> list:
+        return sorted((DATA_PATH / "raw/news").rglob("*.parquet"))
+
+    def _iter_news_chunks(self, news_files: list):
+        """Yield articles in chunks of at most `chunk_rows`, reading row groups lazily"""
         for file in news_files:
+            country_name = file.parent.name.replace("_", " ")
+            country = self.country_map.get(country_name, "UNKNOWN")
             try:
-                df = pd.read_parquet(file)
-                country_name = file.parent.name.replace("_", " ")
-                df['country'] = self.country_map.get(country_name, "UNKNOWN")
-                dfs.append(df)
+                parquet_file = pq.ParquetFile(file)
+                columns = [c for c in NEWS_COLUMNS if c in parquet_file.schema_arrow.names]
+                for batch in parquet_file.iter_batches(batch_size=self.chunk_rows, columns=columns):
+                    df = batch.to_pandas()
+                    for column in NEWS_COLUMNS:
+                        if column not in df:
+                            df[column] = None
+                    df['country'] = country
+                    df['source_file'] = file.relative_to(DATA_PATH).as_posix()
+                    yield df
             except Exception as e:
                 print(f"Error loading {file}: {str(e)}")
                 continue
-                
-        return pd.concat(dfs).reset_index(drop=True)
     
+    @timed("sentiment.calculate_sentiment")
     def _calculate_sentiment(self, text: str) -> float:
         """Calculate sentiment score using hybrid approach"""
         try:
@@ -52,27 +116,192 @@ class NewsSentimentProcessor:
         except:
             return np.nan
     
-    def process_sentiment(self):
-        """Main processing workflow"""
-        news_df = self._load_raw_news()
-        
-        # Calculate sentiment scores
-        news_df['sentiment'] = news_df['content'].fillna('').apply(self._calculate_sentiment)
-        
-        # Aggregate by country and date
-        news_df['date'] = pd.to_datetime(news_df['publishedAt']).dt.date
-        aggregated = news_df.groupby(['country']).agg(
-            avg_sentiment=('sentiment', 'mean'),
-            article_count=('sentiment', 'count')
-        ).reset_index()
-        
+    @timed("sentiment.hf_scores")
+    def _hf_scores(self, texts: list) -> list:
+        """Score texts with the Hugging Face model in batches"""
+        # Resolved outside the try blocks so a model that fails to load is reported, not scored as NaN
+        hf_pipeline = self.hf_pipeline
+        scores = []
+        for i in range(0, len(texts), self.batch_size):
+            batch = texts[i:i + self.batch_size]
+            try:
+                results = hf_pipeline(batch, batch_size=self.batch_size, truncation=True)
+            except Exception:
+                # Retry one by one so a single bad text only loses its own score
+                results = []
+                for text in batch:
+                    try:
+                        results.append(hf_pipeline(text, truncation=True)[0])
+                    except Exception:
+                        results.append(None)
+            scores.extend(
+                np.nan if r is None else r['score'] * (1 if r['label'] == 'POS' else -1)
+                for r in results
+            )
+        return scores
+
+    @timed("sentiment.score_texts")
+    def score_texts(self, texts: pd.Series) -> pd.Series:
+        """Hybrid sentiment for many texts at once.
+
+        VADER scores every distinct text; texts it finds neutral are
+        de-duplicated and sent through the Hugging Face model in batches.
+        """
+        codes, unique_texts = pd.factorize(texts, use_na_sentinel=False)
+        unique_texts = list(unique_texts)
+
+        scores = np.array([self.analyzer.polarity_scores(t)['compound'] for t in unique_texts], dtype=float)
+
+        # Second pass with Hugging Face if neutral
+        neutral = np.flatnonzero((scores > -0.5) & (scores < 0.5))
+        count("sentiment.texts_vader", len(unique_texts))
+        count("sentiment.texts_hf", len(neutral))
+        if len(neutral):
+            scores[neutral] = self._hf_scores([unique_texts[i] for i in neutral])
+
+        return pd.Series(scores[codes], index=texts.index)
+
+    def score_articles(self, articles: pd.DataFrame, batched: bool = True) -> pd.Series:
+        """Sentiment per article, scoring only articles missing from the score store"""
+        if self.score_store is not None:
+            keys = self.score_store.article_keys(articles)
+            scores = self.score_store.lookup(keys, self.model_name)
+        else:
+            scores = pd.Series(np.nan, index=articles.index, dtype=float)
+
+        missing = scores.isna()
+        count("sentiment.cache_hits", int((~missing).sum()))
+        count("sentiment.articles_scored", int(missing.sum()))
+        texts = articles.loc[missing, 'content'].fillna('')
+        if batched:
+            new_scores = self.score_texts(texts)
+        else:
+            new_scores = texts.apply(self._calculate_sentiment)
+        scores[missing] = new_scores
+
+        if self.score_store is not None:
+            self.score_store.store(keys[missing], new_scores, self.model_name)
+        return scores
+
+    def partial_aggregates(self, news_files: list, batched: bool = True) -> pd.DataFrame:
+        """Stream the given files chunk by chunk into per-file, per-country, per-day rollups.
+
+        Only one chunk of articles is held in memory at a time; everything else
+        lives in the running rollups.
+        """
+        start = time.perf_counter()
+        rollups = combine_rollups([])
+        n_articles = 0
+        for chunk in self._iter_news_chunks(news_files):
+            chunk['sentiment'] = self.score_articles(chunk, batched)
+            chunk['date'] = article_dates(chunk['publishedAt'])
+            rollups = combine_rollups([rollups, rollup_articles(chunk)])
+            n_articles += len(chunk)
+
+        elapsed = time.perf_counter() - start
+        print(f"Processed {n_articles} articles in {elapsed:.1f}s "
+              f"({n_articles / max(elapsed, 1e-9):.1f} articles/s, {'batched' if batched else 'per-row'})")
+        return rollups
+
+    def _parallel_partials(self, news_files: list, workers: int, batched: bool) -> list:
+        """Shard news files over a process pool, one processor (and model) per worker"""
+        # Split the machine's cores between workers so torch does not oversubscribe
+        torch_threads = max(1, (os.cpu_count() or 1) // workers)
+        init_kwargs = {
+            'batch_size': self.batch_size,
+            'use_cache': self.score_store is not None,
+            'model_variant': self.model_variant,
+            'torch_threads': torch_threads,
+        }
+        # Largest files first, dealt round-robin so shards carry similar work
+        by_size = sorted(news_files, key=lambda f: f.stat().st_size, reverse=True)
+        shards = [by_size[i::workers] for i in range(workers)]
+        shards = [shard for shard in shards if shard]
+
+        with ProcessPoolExecutor(max_workers=len(shards), initializer=_init_worker,
+                                 initargs=(init_kwargs,)) as executor:
+            results = list(executor.map(_score_shard, shards, [batched] * len(shards)))
+        # Workers time their own scoring; fold their metrics into this process's
+        for _, worker_metrics in results:
+            METRICS.merge(worker_metrics)
+        return [partial for partial, _ in results]
+
+    def process_sentiment(self, batched: bool = True, workers: int = 1, full_refresh: bool = False):
+        """Main processing workflow.
+
+        Only news files that are new or changed since the last run are scored;
+        their per-day rollups replace any stored rollups for the same file.
+        Every scanned file is recorded in a manifest, so files that yield no
+        articles (empty or unreadable) are not rescanned until they change.
+        """
+        rollup_path = DATA_PATH / "processed/news_sentiment_rollups.parquet"
+        manifest_path = DATA_PATH / "processed/news_sentiment_manifest.parquet"
+        stored = load_file_rollups(None if full_refresh else rollup_path)
+
+        news_files = self._news_files()
+        file_keys = {file: file.relative_to(DATA_PATH).as_posix() for file in news_files}
+        mtimes = {file_keys[file]: file.stat().st_mtime for file in news_files}
+        if full_refresh:
+            seen = {}
+        elif manifest_path.exists():
+            manifest = pd.read_parquet(manifest_path)
+            seen = dict(zip(manifest['source_file'], manifest['source_mtime']))
+        else:
+            # Runs before the manifest existed only recorded files that had rollups
+            seen = dict(zip(stored['source_file'], stored['source_mtime']))
+        changed = [file for file in news_files if seen.get(file_keys[file]) != mtimes[file_keys[file]]]
+        print(f"{len(changed)} of {len(news_files)} news files are new or changed")
+
+        if workers > 1 and len(changed) > 1:
+            partials = self._parallel_partials(changed, workers, batched)
+        else:
+            partials = [self.partial_aggregates(changed, batched)]
+
+        # Keep rollups of unchanged files, replace those of changed ones, drop deleted files
+        changed_keys = {file_keys[file] for file in changed}
+        kept = stored[stored['source_file'].isin(list(mtimes)) & ~stored['source_file'].isin(changed_keys)]
+        fresh = combine_rollups(partials)
+        fresh['source_mtime'] = fresh['source_file'].map(mtimes)
+        file_rollups = pd.concat([kept, fresh], ignore_index=True)
+        file_rollups['article_count'] = file_rollups['article_count'].astype(int)
+
+        daily = daily_rollups(file_rollups)
+
+        # All-time average per country, plus trailing 7/30-day windows for risk scoring
+        totals = combine_rollups([file_rollups], keys=['country'])
+        aggregated = pd.DataFrame({
+            'country': totals['country'],
+            'avg_sentiment': totals['sentiment_sum'] / totals['article_count'].replace(0, np.nan),
+            'article_count': totals['article_count'].astype(int),
+        })
+        if not daily.empty:
+            aggregated = aggregated.merge(window_summary(daily), on='country', how='left')
 
         # Save processed data
         output_path = DATA_PATH / "processed/news_sentiment.parquet"
         output_path.parent.mkdir(parents=True, exist_ok=True)
+        file_rollups.to_parquet(rollup_path)
+        pd.DataFrame({'source_file': list(mtimes), 'source_mtime': list(mtimes.values())}).to_parquet(manifest_path)
+        daily.to_parquet(DATA_PATH / "processed/news_sentiment_daily.parquet")
         aggregated.to_parquet(output_path)
         print(f"Saved sentiment data to {output_path}")
 
+_worker_processor = None
+
+def _init_worker(init_kwargs: dict):
+    global _worker_processor
+    os.environ["OMP_NUM_THREADS"] = str(init_kwargs['torch_threads'])
+    os.environ["MKL_NUM_THREADS"] = str(init_kwargs['torch_threads'])
+    _worker_processor = NewsSentimentProcessor(**init_kwargs)
+
+def _score_shard(news_files: list, batched: bool) -> tuple:
+    METRICS.reset()
+    partial = _worker_processor.partial_aggregates(news_files, batched)
+    return partial, METRICS.snapshot()
+
 if __name__ == "__main__":
-    processor = NewsSentimentProcessor()
-    processor.process_sentiment()
\ No newline at end of file
+    variant = next((v for v in MODEL_VARIANTS if f"--{v}" in sys.argv), "default")
+    workers = int(next((a.split("=")[1] for a in sys.argv if a.startswith("--workers=")), 1))
+    with instrumented_run("process_news_sentiment"):
+        processor = NewsSentimentProcessor(model_variant=variant)
+        processor.process_sentiment(workers=workers)
\ No newline at end of file
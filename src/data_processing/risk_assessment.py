@@ -1,8 +1,14 @@
 import pandas as pd
 import numpy as np
 from pathlib import Path
-from sklearn.preprocessing import MinMaxScaler
 import yaml
+import sys
+
+sys.path.append(str(Path(__file__).parent.parent))
+from data_processing.risk_scoring import RiskScoringEngine, load_feature_specs
+from data_processing.risk_scenarios import simplex_grid, dirichlet_weights, rank_stability
+from data_processing.dashboard_slices import build_dashboard_slices
+from instrumentation import timed, instrumented_run
 
 PROJECT_ROOT = Path(__file__).parent.parent.parent 
 
@@ -10,20 +16,11 @@ DATA_PATH = PROJECT_ROOT / "data"
 CONFIG_PATH = PROJECT_ROOT / "config"
 
 class RiskAssessor:
-    def __init__(self):
+    def __init__(self, feature_specs: list = None):
         self.countries = self._load_country_list()
-        self.weights = {
-            'gdp_growth': 0.10,
-            'inflation': 0.25,
-            'fx_volatility': 0.10,
-            'drawdown':0.10,
-            'var':0.05,
-            'arima_forecast': 0.025,
-            'prophet_forecast': 0.025,
-            'debt_to_gdp': 0.20,
-            'current_account': 0.10,
-            'sentiment': 0.10
-        }
+        # Feature columns, directions, weights and normalizations come from config/risk_features.yaml
+        self.engine = RiskScoringEngine(feature_specs if feature_specs is not None else load_feature_specs())
+        self.weights = dict(zip(self.engine.names, self.engine.weights))
     
     def _load_country_list(self):
         """Load countries from config"""
@@ -43,57 +40,67 @@ class RiskAssessor:
         """Load news sentiment data"""
         return pd.read_parquet(DATA_PATH / "processed/news_sentiment.parquet")
 
+    @timed("risk.calculate_scores")
     def calculate_scores(self):
         # Load data from all sources
         macro = self._load_macro_data()
         fx_vol = self._load_fx_volatility()
         sentiment = self._load_sentiment_scores()
-        
+        return self.score_frames(macro, fx_vol, sentiment)
+
+    def score_frames(self, macro: pd.DataFrame, fx_vol: pd.DataFrame, sentiment: pd.DataFrame,
+                     sentiment_how: str = 'inner') -> pd.DataFrame:
+        """Score already-loaded macro, FX and sentiment inputs (latest or point-in-time).
+
+        With `sentiment_how='left'` countries without sentiment are kept and
+        their sentiment columns are NaN. Raises ValueError if no country has
+        every input.
+        """
         # Merge datasets
-        combined = macro.merge(fx_vol, on='country').merge(sentiment, on='country')
+        combined = macro.merge(fx_vol, on='country').merge(sentiment, on='country', how=sentiment_how)
+        if combined.empty:
+            raise ValueError("No country has all of the macro, FX and sentiment inputs")
         
-        # Normalize indicators (higher = better except for inflation/debt)
-        scaler = MinMaxScaler(feature_range=(0,100))
-        combined['gdp_score'] = scaler.fit_transform(combined[['gdp_growth']])
-        combined['inflation_score'] = 100 - scaler.fit_transform(combined[['inflation']])
-        combined['debt_score'] = 100 - scaler.fit_transform(combined[['debt_to_gdp']])
-        combined['fx_score'] = 100 - scaler.fit_transform(combined[['volatility']])
-        combined['drawdown_score'] = 100 - scaler.fit_transform(combined[['drawdown']])
-        combined['var_score'] = 100 - scaler.fit_transform(combined[['var']])
-        combined['arima_score'] = scaler.fit_transform(combined[['arima_forecast']])
-        combined['prophet_score'] = scaler.fit_transform(combined[['prophet_forecast']])
-        combined['current_account_score'] = scaler.fit_transform(combined[['current_account']])
-        combined['sentiment_score'] = scaler.fit_transform(combined[['avg_sentiment']])
-
-        combined['debt_score'] = combined['debt_score'].fillna(0)
-
-        # Calculate weighted risk score
-        combined['risk_score'] = (
-            combined['gdp_score'] * self.weights['gdp_growth'] +
-            combined['inflation_score'] * self.weights['inflation'] +
-            combined['fx_score'] * self.weights['fx_volatility'] +
-            combined['drawdown_score'] * self.weights['drawdown'] +
-            combined['var_score'] * self.weights['var'] +
-            combined['arima_score'] * self.weights['arima_forecast'] +
-            combined['prophet_score'] * self.weights['prophet_forecast'] +
-            combined['debt_score'] * self.weights['debt_to_gdp'] +
-            combined['current_account_score'] * self.weights['current_account'] +
-            combined['sentiment_score'] * self.weights['sentiment']
-        )
+        # Normalize all indicators to 0-100 (higher = safer) and weight them in one pass
+        scores = self.engine.fit_score(combined)
+        combined[scores.columns] = scores
+        self.combined = combined
 
-        
+        return combined.sort_values('risk_score', ascending=False)[
+            ['country', 'region', 'risk_score'] + self.engine.names
+        ]
+
+    def scenario_sweep(self, method: str = "dirichlet", n_samples: int = 10000, steps: int = 4,
+                       concentration: float = None, seed: int = None, top_k: int = 3) -> pd.DataFrame:
+        """Rank stability of each country under many alternative weightings.
+
+        `method` is 'dirichlet' (random weight vectors, centred on the configured
+        weights when `concentration` is given) or 'grid' (every weighting in
+        1/`steps` increments). All scenarios are scored against the normalized
+        matrix from the last `calculate_scores` run.
+        """
+        if not hasattr(self, 'combined'):
+            self.calculate_scores()
+
+        if method == "dirichlet":
+            weights = dirichlet_weights(self.engine.weights, n_samples, concentration, seed)
+        elif method == "grid":
+            weights = simplex_grid(len(self.engine.weights), steps) * self.engine.weights.sum()
+        else:
+            raise ValueError(f"Unknown scenario method: {method}")
+
+        S = self.combined[self.engine.names].to_numpy(dtype=float)
+        return rank_stability(self.engine, S, weights, self.combined['country'].tolist(), top_k=top_k)
 
-        return combined.sort_values('risk_score', ascending=False)[[
-            'country', 'region', 'risk_score', 'gdp_score', 'inflation_score',
-            'debt_score', 'fx_score', 'drawdown_score', 'var_score',  'arima_score' , 'prophet_score','current_account_score', 'sentiment_score'
-        ]]
-    
 
 def main():
     risk_scores = RiskAssessor().calculate_scores()
     risk_scores.reset_index(inplace=True,drop=True)
     risk_scores.to_parquet(DATA_PATH / "processed/risk_scores.parquet")
     print("Latest Risk Scores:\n", risk_scores.head(50))
+    # Per-country slices the dashboard reads on every country selection
+    build_dashboard_slices()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with instrumented_run("risk_assessment"):
+        main()
\ No newline at end of file
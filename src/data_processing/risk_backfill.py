@@ -0,0 +1,224 @@
+import pandas as pd
+import numpy as np
+from pathlib import Path
+from dataclasses import replace
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import os
+import sys
+
+sys.path.append(str(Path(__file__).parent.parent))
+from data_processing.risk_assessment import RiskAssessor
+from data_processing.risk_scoring import load_feature_specs
+from data_processing.volatility_calculations import FXVolatility
+from data_processing.fx_store import consolidate_fx_store
+from data_processing.fx_metrics import to_position_matrix, compute_fx_metrics, volatility_series
+from data_processing.fx_forecasting import run_forecasts
+from data_processing.process_macro_data import latest_values
+from data_processing.macro_panel import INDICATOR_NAMES
+from data_processing.sentiment_rollups import window_summary
+
+DATA_PATH = Path(__file__).parent.parent.parent / "data"
+HISTORY_PATH = DATA_PATH / "processed/risk_history"
+
+# World Bank annual figures for year Y are assumed published six months after the year ends
+MACRO_RELEASE_LAG = pd.DateOffset(months=6)
+FORECAST_COLUMNS = ('arima_forecast', 'prophet_forecast')
+# Dates before the stored news history have no sentiment; its weight is spread over the rest
+SENTIMENT_COLUMN = 'avg_sentiment'
+
+
+def _partition_file(date) -> Path:
+    return HISTORY_PATH / f"date={pd.Timestamp(date):%Y-%m-%d}" / "data.parquet"
+
+
+def stored_dates() -> set:
+    """Dates that already have a risk score partition"""
+    if not HISTORY_PATH.exists():
+        return set()
+    return {
+        pd.Timestamp(d.name.split("=", 1)[1])
+        for d in HISTORY_PATH.glob("date=*") if (d / "data.parquet").exists()
+    }
+
+
+def macro_as_of(facts: pd.DataFrame, as_of) -> pd.DataFrame:
+    """Latest macro value per country and indicator that had been released by `as_of`.
+
+    Values are the current World Bank vintage; only the release timing of each
+    year's observation is point-in-time, later revisions are not.
+    """
+    cutoff_year = (pd.Timestamp(as_of) - MACRO_RELEASE_LAG).year - 1
+    latest = latest_values(facts[pd.to_numeric(facts['year'], errors='coerce') <= cutoff_year])
+    if latest.empty:
+        return pd.DataFrame(columns=['country', 'region'] + list(INDICATOR_NAMES.values()))
+    macro = latest.pivot(index=['country', 'region'], columns='indicator', values='value').reset_index()
+    macro.columns.name = None
+    return macro.rename(columns=INDICATOR_NAMES)
+
+
+def fx_as_of(fx_data: pd.DataFrame, country_map: dict, as_of, window: int = 90,
+             var_confidence: float = 0.95, forecasts: bool = False) -> pd.DataFrame:
+    """FX volatility, drawdown and VaR per pair from bars up to `as_of`"""
+    history = fx_data[fx_data.index <= pd.Timestamp(as_of)]
+    if history.empty:
+        return pd.DataFrame(columns=['pair', 'volatility', 'drawdown', 'var', 'country'])
+    prices, dates, pairs = to_position_matrix(history)
+    metrics, vol = compute_fx_metrics(prices, dates, pairs, window, var_confidence)
+    if forecasts:
+        # Already inside a backfill worker, so fit in-process rather than nesting another pool
+        fitted, _ = run_forecasts(volatility_series(vol, pairs), max_workers=1)
+        metrics = metrics.join(fitted, on='pair')
+    else:
+        for column in FORECAST_COLUMNS:
+            metrics[column] = np.nan
+    metrics['country'] = metrics['pair'].str[3:].map(country_map)
+    return metrics
+
+
+def sentiment_as_of(daily: pd.DataFrame, as_of) -> pd.DataFrame:
+    """All-time and trailing-window sentiment per country from articles published by `as_of`"""
+    seen = daily[daily['date'] <= pd.Timestamp(as_of)]
+    totals = seen.groupby('country')[['sentiment_sum', 'article_count']].sum()
+    sentiment = pd.DataFrame({
+        'country': totals.index,
+        'avg_sentiment': (totals['sentiment_sum'] / totals['article_count'].replace(0, np.nan)).to_numpy(),
+        'article_count': totals['article_count'].astype(int).to_numpy(),
+    })
+    if seen.empty:
+        return sentiment
+    return sentiment.merge(window_summary(seen, as_of), on='country', how='left')
+
+
+_worker_inputs = None
+
+
+def _init_worker(inputs: dict):
+    global _worker_inputs
+    _worker_inputs = inputs
+
+
+def _score_date(as_of) -> tuple:
+    """Compute and store the risk scores for one date; returns (date, rows written).
+
+    Dates without any country that has both macro and FX data (e.g. before the
+    first released macro year) are skipped and report 0 rows.
+    """
+    inputs = _worker_inputs
+    macro = macro_as_of(inputs['facts'], as_of)
+    fx_vol = fx_as_of(inputs['fx_data'], inputs['country_map'], as_of, inputs['window'],
+                      inputs['var_confidence'], inputs['forecasts'])
+    if macro.merge(fx_vol[['country']], on='country').empty:
+        return as_of, 0
+    assessor = RiskAssessor(inputs['specs'])
+    scores = assessor.score_frames(
+        macro, fx_vol, sentiment_as_of(inputs['daily'], as_of), sentiment_how='left'
+    ).reset_index(drop=True)
+
+    output = _partition_file(as_of)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    # Write then rename, so an interrupted run never leaves a partial partition behind
+    tmp = output.with_suffix(f".{os.getpid()}.tmp")
+    scores.to_parquet(tmp, index=False)
+    os.replace(tmp, output)
+    return as_of, len(scores)
+
+
+def backfill_risk_history(start, end=None, freq: str = "W-FRI", workers: int = None,
+                          forecasts: bool = False, window: int = 90, var_confidence: float = 0.95,
+                          overwrite: bool = False) -> list:
+    """Recompute point-in-time risk scores for every `freq` date from `start` to `end`.
+
+    Each date only sees FX bars up to that date, macro years released by then
+    and articles published by then. Dates already in the store are skipped
+    unless `overwrite`. Without `forecasts` the ARIMA/Prophet features are left
+    out and their weight is spread over the remaining features, as is the
+    sentiment weight on dates before the first stored news day. Dates with
+    nothing to score are skipped. Returns the list of dates computed.
+    """
+    end = pd.Timestamp(end) if end is not None else pd.Timestamp.today().normalize()
+    dates = list(pd.date_range(start, end, freq=freq))
+    done = set() if overwrite else stored_dates()
+    todo = [d for d in dates if d not in done]
+    print(f"{len(todo)} of {len(dates)} dates need risk scores")
+    if not todo:
+        return []
+
+    specs = load_feature_specs()
+    reweighted = (SENTIMENT_COLUMN,) + (() if forecasts else FORECAST_COLUMNS)
+    specs = [replace(s, nan_policy="reweight") if s.column in reweighted else s for s in specs]
+
+    consolidate_fx_store()
+    fx = FXVolatility(window=window, var_confidence=var_confidence, use_forecast_cache=False)
+    inputs = {
+        'specs': specs,
+        'fx_data': fx.fx_data[fx.fx_data.index <= end],
+        'country_map': fx.country_map,
+        'facts': pd.read_parquet(DATA_PATH / "processed/macro_facts.parquet"),
+        'daily': pd.read_parquet(DATA_PATH / "processed/news_sentiment_daily.parquet",
+                                 columns=['country', 'date', 'sentiment_sum', 'article_count']),
+        'window': window,
+        'var_confidence': var_confidence,
+        'forecasts': forecasts,
+    }
+
+    workers = workers or os.cpu_count() or 1
+    computed = []
+
+    def collect(as_of, result):
+        # Same per-date handling for the serial and the parallel path
+        try:
+            _, rows = result()
+        except Exception as e:
+            print(f"Error scoring {as_of:%Y-%m-%d}: {str(e)}")
+            return
+        if rows:
+            computed.append(as_of)
+        else:
+            print(f"Skipping {as_of:%Y-%m-%d}: no country has macro and FX data yet")
+
+    if workers == 1 or len(todo) == 1:
+        _init_worker(inputs)
+        for as_of in todo:
+            collect(as_of, lambda: _score_date(as_of))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(todo)), initializer=_init_worker,
+                                 initargs=(inputs,)) as executor:
+            futures = {executor.submit(_score_date, as_of): as_of for as_of in todo}
+            for future in as_completed(futures):
+                collect(futures[future], future.result)
+    print(f"Stored risk scores for {len(computed)} dates in {HISTORY_PATH}")
+    return sorted(computed)
+
+
+def load_risk_history(countries: list = None, start=None, end=None) -> pd.DataFrame:
+    """Stored point-in-time risk scores as a long DataFrame with a 'date' column"""
+    if not HISTORY_PATH.exists():
+        return pd.DataFrame(columns=['date', 'country', 'risk_score'])
+    filters = []
+    if countries is not None:
+        filters.append(('country', 'in', list(countries)))
+    if start is not None:
+        filters.append(('date', '>=', f"{pd.Timestamp(start):%Y-%m-%d}"))
+    if end is not None:
+        filters.append(('date', '<=', f"{pd.Timestamp(end):%Y-%m-%d}"))
+    history = pd.read_parquet(HISTORY_PATH, filters=filters or None)
+    history['date'] = pd.to_datetime(history['date'].astype(str))
+    return history.sort_values(['date', 'risk_score'], ascending=[True, False]).reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill point-in-time risk scores")
+    parser.add_argument("--start", required=True, help="first date (YYYY-MM-DD)")
+    parser.add_argument("--end", default=None, help="last date, defaults to today")
+    parser.add_argument("--freq", default="W-FRI", help="pandas date frequency between dates")
+    parser.add_argument("--workers", type=int, default=None, help="parallel processes over dates")
+    parser.add_argument("--forecasts", action="store_true", help="also fit ARIMA/Prophet for each date")
+    parser.add_argument("--overwrite", action="store_true", help="recompute dates already stored")
+    args = parser.parse_args()
+    backfill_risk_history(args.start, args.end, args.freq, args.workers, args.forecasts,
+                          overwrite=args.overwrite)
+
+
+if __name__ == "__main__":
+    main()
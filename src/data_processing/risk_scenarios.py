@@ -0,0 +1,99 @@
+import pandas as pd
+import numpy as np
+from itertools import combinations
+
+
+def simplex_grid(n_features: int, steps: int) -> np.ndarray:
+    """All weight vectors on the simplex whose weights are multiples of 1/steps.
+
+    Uses stars and bars, so there are C(steps + n_features - 1, n_features - 1)
+    vectors (2002 for 10 features and 5 steps).
+    """
+    slots = steps + n_features - 1
+    bars = np.array(list(combinations(range(slots), n_features - 1)))
+    edges = np.hstack([np.full((len(bars), 1), -1), bars, np.full((len(bars), 1), slots)])
+    return (np.diff(edges, axis=1) - 1) / steps
+
+
+def dirichlet_weights(base_weights: np.ndarray, n_samples: int, concentration: float = None,
+                      seed: int = None) -> np.ndarray:
+    """Random weight vectors summing to the base total.
+
+    With `concentration`, samples are centred on the base weights (larger =
+    closer to them); without it they are uniform over the simplex.
+    """
+    base_weights = np.asarray(base_weights, dtype=float)
+    rng = np.random.default_rng(seed)
+    alpha = np.ones_like(base_weights) if concentration is None \
+        else concentration * base_weights / base_weights.sum()
+    return rng.dirichlet(alpha, size=n_samples) * base_weights.sum()
+
+
+def scenario_ranks(composites: np.ndarray) -> np.ndarray:
+    """Rank (1 = safest) of every row in every scenario column; NaN scores get NaN ranks"""
+    missing = np.isnan(composites)
+    order = np.argsort(np.where(missing, np.inf, -composites), axis=0, kind='stable')
+    ranks = np.empty(composites.shape, dtype=float)
+    positions = np.broadcast_to(np.arange(1, composites.shape[0] + 1)[:, None], composites.shape)
+    np.put_along_axis(ranks, order, positions, axis=0)
+    ranks[missing] = np.nan
+    return ranks
+
+
+def rank_stability(engine, scores: np.ndarray, weights: np.ndarray, countries: list,
+                   top_k: int = 3, chunk_size: int = 10000) -> pd.DataFrame:
+    """Rank statistics per country across many weight vectors.
+
+    `scores` is the already-normalized (countries x features) matrix and
+    `weights` is (scenarios x features). Composites and ranks are computed for
+    a chunk of scenarios at a time with one matrix product per chunk.
+    """
+    weights = np.atleast_2d(np.asarray(weights, dtype=float))
+    base_ranks = scenario_ranks(engine.composite(scores)[:, None])[:, 0]
+
+    n_countries = len(countries)
+    rank_sum = np.zeros(n_countries)
+    rank_sq_sum = np.zeros(n_countries)
+    counts = np.zeros(n_countries)
+    best = np.full(n_countries, np.inf)
+    worst = np.full(n_countries, -np.inf)
+    top = np.zeros(n_countries)
+    moved = np.zeros(n_countries)
+    rank_hist = np.zeros((n_countries, n_countries + 1))
+
+    for start in range(0, len(weights), chunk_size):
+        ranks = scenario_ranks(engine.composite(scores, weights[start:start + chunk_size]))
+        valid = ~np.isnan(ranks)
+        filled = np.where(valid, ranks, 0)
+        rank_sum += filled.sum(axis=1)
+        rank_sq_sum += (filled ** 2).sum(axis=1)
+        counts += valid.sum(axis=1)
+        best = np.fmin(best, np.nanmin(np.where(valid, ranks, np.inf), axis=1))
+        worst = np.fmax(worst, np.nanmax(np.where(valid, ranks, -np.inf), axis=1))
+        top += (valid & (ranks <= top_k)).sum(axis=1)
+        moved += (valid & (ranks != base_ranks[:, None])).sum(axis=1)
+        # Rank histogram per country for percentiles without keeping every scenario
+        for r in range(1, n_countries + 1):
+            rank_hist[:, r] += (ranks == r).sum(axis=1)
+
+    with np.errstate(all="ignore"):
+        mean = rank_sum / counts
+        std = np.sqrt(np.maximum(rank_sq_sum / counts - mean ** 2, 0))
+        cdf = np.cumsum(rank_hist, axis=1) / counts[:, None]
+
+    def percentile(q):
+        return np.where(counts > 0, np.argmax(cdf >= q, axis=1), np.nan)
+
+    return pd.DataFrame({
+        'country': countries,
+        'base_rank': base_ranks,
+        'mean_rank': mean,
+        'std_rank': std,
+        'best_rank': np.where(counts > 0, best, np.nan),
+        'worst_rank': np.where(counts > 0, worst, np.nan),
+        'p05_rank': percentile(0.05),
+        'p95_rank': percentile(0.95),
+        f'top{top_k}_share': top / counts,
+        'rank_changed_share': moved / counts,
+        'scenarios': counts.astype(int),
+    }).sort_values('base_rank').reset_index(drop=True)
@@ -0,0 +1,147 @@
+import pandas as pd
+import numpy as np
+from pathlib import Path
+from dataclasses import dataclass
+from scipy.special import ndtr
+import yaml
+
+CONFIG_PATH = Path(__file__).parent.parent.parent / "config"
+
+NORMALIZATIONS = ("minmax", "zscore", "rank")
+DIRECTIONS = ("higher_better", "lower_better")
+NAN_POLICIES = ("propagate", "zero", "mean", "reweight")
+
+
+@dataclass
+class FeatureSpec:
+    """One input column turned into a 0-100 score (higher = safer)"""
+    name: str
+    column: str
+    weight: float
+    direction: str = "higher_better"
+    normalization: str = "minmax"
+    nan_policy: str = "propagate"
+
+    def __post_init__(self):
+        for value, allowed in ((self.direction, DIRECTIONS), (self.normalization, NORMALIZATIONS),
+                               (self.nan_policy, NAN_POLICIES)):
+            if value not in allowed:
+                raise ValueError(f"{self.name}: {value!r} must be one of {allowed}")
+
+
+def load_feature_specs(file: str = "risk_features.yaml") -> list:
+    """Read the feature spec list from config"""
+    with open(CONFIG_PATH / file) as f:
+        config = yaml.safe_load(f)
+    defaults = config.get('defaults', {})
+    return [FeatureSpec(name=name, **{**defaults, **spec}) for name, spec in config['features'].items()]
+
+
+class RiskScoringEngine:
+    """Normalizes all features and computes the weighted composite as matrix operations.
+
+    `fit` learns per-feature normalization parameters from reference data (the
+    observed countries); `transform`/`score` then apply them to any number of
+    rows, e.g. thousands of hypothetical what-if scenarios.
+    """
+    def __init__(self, specs: list = None):
+        self.specs = specs if specs is not None else load_feature_specs()
+        self.names = [s.name for s in self.specs]
+        self.columns = [s.column for s in self.specs]
+        self.weights = np.array([s.weight for s in self.specs], dtype=float)
+        self._lower = np.array([s.direction == "lower_better" for s in self.specs])
+        self._methods = np.array([s.normalization for s in self.specs])
+        self._policies = np.array([s.nan_policy for s in self.specs])
+
+    def _matrix(self, data) -> np.ndarray:
+        if isinstance(data, pd.DataFrame):
+            return data[self.columns].to_numpy(dtype=float)
+        return np.asarray(data, dtype=float)
+
+    def fit(self, data) -> "RiskScoringEngine":
+        X = self._matrix(data)
+        with np.errstate(all="ignore"):
+            self.data_min_ = np.nanmin(X, axis=0)
+            data_range = np.nanmax(X, axis=0) - self.data_min_
+            self.mean_ = np.nanmean(X, axis=0)
+            self.std_ = np.nanstd(X, axis=0)
+        # Same handling of constant columns as sklearn's MinMaxScaler
+        data_range[data_range == 0.0] = 1.0
+        self.scale_ = 100.0 / data_range
+        self.std_[self.std_ == 0.0] = 1.0
+        # Sorted reference values per feature, NaNs last, for rank scores
+        self.reference_ = np.sort(X, axis=0)
+        self.reference_count_ = (~np.isnan(X)).sum(axis=0)
+        # Mean score of the reference rows, used by the 'mean' NaN policy
+        with np.errstate(all="ignore"):
+            self.score_mean_ = np.nanmean(self._normalize(X), axis=0)
+        return self
+
+    def _normalize(self, X: np.ndarray) -> np.ndarray:
+        """0-100 scores before NaN policies are applied"""
+        S = np.empty_like(X)
+
+        minmax = self._methods == "minmax"
+        if minmax.any():
+            scale = self.scale_[minmax]
+            S[:, minmax] = X[:, minmax] * scale + (0.0 - self.data_min_[minmax] * scale)
+
+        zscore = self._methods == "zscore"
+        if zscore.any():
+            S[:, zscore] = 100.0 * ndtr((X[:, zscore] - self.mean_[zscore]) / self.std_[zscore])
+
+        for j in np.flatnonzero(self._methods == "rank"):
+            # Percentile of each value among the reference values (average rank for ties)
+            n = self.reference_count_[j]
+            ref = self.reference_[:n, j]
+            below = np.searchsorted(ref, X[:, j], side="left")
+            upto = np.searchsorted(ref, X[:, j], side="right")
+            ranks = np.clip((below + upto - 1) / 2, 0, max(n - 1, 0))
+            S[:, j] = np.where(np.isnan(X[:, j]), np.nan, 100.0 * ranks / max(n - 1, 1))
+
+        S[:, self._lower] = 100 - S[:, self._lower]
+        return S
+
+    def transform(self, data) -> np.ndarray:
+        """0-100 score matrix (rows x features) with NaN policies applied.
+
+        'mean' fills a missing score with the feature's mean score over the
+        fitted reference rows, so a row's scores do not depend on the batch.
+        """
+        S = self._normalize(self._matrix(data))
+        missing = np.isnan(S)
+        zero = missing & (self._policies == "zero")
+        S[zero] = 0.0
+        mean = missing & (self._policies == "mean")
+        if mean.any():
+            S[mean] = np.broadcast_to(self.score_mean_, S.shape)[mean]
+        return S
+
+    def composite(self, S: np.ndarray, weights: np.ndarray = None) -> np.ndarray:
+        """Weighted composite for one weight vector (k,) or many (m, k) -> (n,) or (n, m).
+
+        Features with the 'reweight' policy drop out of a row's composite when
+        missing and the row's remaining weights are scaled back to their total.
+        """
+        W = self.weights if weights is None else np.asarray(weights, dtype=float)
+        reweight = self._policies == "reweight"
+        if not reweight.any():
+            return S @ W.T
+
+        available = ~(np.isnan(S) & reweight)
+        filled = np.where(available, S, 0.0)
+        total = W.sum(axis=-1)
+        kept = available.astype(float) @ W.T
+        with np.errstate(all="ignore"):
+            return (filled @ W.T) * (total / kept)
+
+    def score(self, data) -> pd.DataFrame:
+        """Score columns plus composite risk_score for every row of `data`"""
+        S = self.transform(data)
+        index = data.index if isinstance(data, pd.DataFrame) else None
+        scores = pd.DataFrame(S, columns=self.names, index=index)
+        scores['risk_score'] = self.composite(S)
+        return scores
+
+    def fit_score(self, data) -> pd.DataFrame:
+        return self.fit(data).score(data)
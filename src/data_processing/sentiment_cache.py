@@ -0,0 +1,63 @@
+import pandas as pd
+import numpy as np
+from pathlib import Path
+import hashlib
+import sqlite3
+
+DATA_PATH = Path(__file__).parent.parent.parent / "data"
+CACHE_FILE = DATA_PATH / "cache/sentiment_scores.sqlite"
+# Seconds to wait on a lock held by another worker process
+LOCK_TIMEOUT = 60
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha1((text or "").encode("utf-8")).hexdigest()
+
+
+class SentimentScoreStore:
+    """Persistent article scores keyed by URL, content hash and model name"""
+    def __init__(self, path: Path = CACHE_FILE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with sqlite3.connect(self.path, timeout=LOCK_TIMEOUT) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS scores ("
+                " url TEXT NOT NULL, content_hash TEXT NOT NULL, model TEXT NOT NULL,"
+                " score REAL NOT NULL, PRIMARY KEY (url, content_hash, model))"
+            )
+
+    @staticmethod
+    def article_keys(articles: pd.DataFrame) -> pd.DataFrame:
+        """Cache keys (url, content_hash) for each article row"""
+        return pd.DataFrame({
+            'url': articles['url'].fillna('').astype(str),
+            'content_hash': articles['content'].fillna('').map(content_hash),
+        }, index=articles.index)
+
+    def lookup(self, keys: pd.DataFrame, model: str) -> pd.Series:
+        """Cached scores aligned with `keys`; NaN where an article is not cached"""
+        if keys.empty:
+            return pd.Series(np.nan, index=keys.index, dtype=float)
+        with sqlite3.connect(self.path, timeout=LOCK_TIMEOUT) as conn:
+            conn.execute("CREATE TEMP TABLE wanted (url TEXT, content_hash TEXT)")
+            conn.executemany("INSERT INTO wanted VALUES (?, ?)",
+                             keys[['url', 'content_hash']].drop_duplicates().itertuples(index=False))
+            cached = pd.read_sql_query(
+                "SELECT s.url, s.content_hash, s.score FROM scores s"
+                " JOIN wanted w ON s.url = w.url AND s.content_hash = w.content_hash"
+                " WHERE s.model = ?",
+                conn, params=(model,)
+            )
+        merged = keys.reset_index().merge(cached, on=['url', 'content_hash'], how='left')
+        return pd.Series(merged['score'].to_numpy(dtype=float), index=keys.index)
+
+    def store(self, keys: pd.DataFrame, scores: pd.Series, model: str):
+        """Persist scores for the given keys, skipping failed (NaN) scores"""
+        rows = keys.assign(score=scores).dropna(subset=['score']).drop_duplicates(['url', 'content_hash'])
+        if rows.empty:
+            return
+        with sqlite3.connect(self.path, timeout=LOCK_TIMEOUT) as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO scores (url, content_hash, model, score) VALUES (?, ?, ?, ?)",
+                ((r.url, r.content_hash, model, float(r.score)) for r in rows.itertuples(index=False))
+            )
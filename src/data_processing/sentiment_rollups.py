@@ -0,0 +1,75 @@
+import pandas as pd
+import numpy as np
+from pathlib import Path
+
+ROLLUP_KEYS = ['source_file', 'country', 'date']
+ROLLUP_COLUMNS = ROLLUP_KEYS + ['sentiment_sum', 'article_count', 'sentiment_min', 'sentiment_max']
+WINDOWS = (7, 30)
+
+
+def article_dates(published_at: pd.Series) -> pd.Series:
+    """UTC publication day of each article (NaT when missing or unparseable)"""
+    dates = pd.to_datetime(published_at, utc=True, errors='coerce')
+    return dates.dt.tz_localize(None).dt.normalize()
+
+
+def rollup_articles(articles: pd.DataFrame) -> pd.DataFrame:
+    """Sum, count, min and max of scored articles per source file, country and day"""
+    return articles.groupby(ROLLUP_KEYS, dropna=False).agg(
+        sentiment_sum=('sentiment', 'sum'),
+        article_count=('sentiment', 'count'),
+        sentiment_min=('sentiment', 'min'),
+        sentiment_max=('sentiment', 'max'),
+    ).reset_index()
+
+
+def combine_rollups(frames: list, keys: list = ROLLUP_KEYS) -> pd.DataFrame:
+    """Merge partial rollups that may share keys"""
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=ROLLUP_COLUMNS)
+    return pd.concat(frames).groupby(keys, dropna=False).agg(
+        sentiment_sum=('sentiment_sum', 'sum'),
+        article_count=('article_count', 'sum'),
+        sentiment_min=('sentiment_min', 'min'),
+        sentiment_max=('sentiment_max', 'max'),
+    ).reset_index()
+
+
+def load_file_rollups(path: Path = None) -> pd.DataFrame:
+    """Stored per-file rollups, with the mtime each source file had when it was scored"""
+    if path is None or not path.exists():
+        return pd.DataFrame(columns=ROLLUP_COLUMNS + ['source_mtime'])
+    return pd.read_parquet(path)
+
+
+def daily_rollups(file_rollups: pd.DataFrame, windows: tuple = WINDOWS) -> pd.DataFrame:
+    """Per-country per-day aggregates with trailing calendar-day window averages.
+
+    Window averages are ratios of summed sums and counts over the last N days,
+    so they weight every article equally, like the all-time average.
+    """
+    daily = combine_rollups([file_rollups], keys=['country', 'date'])
+    daily = daily.dropna(subset=['date']).sort_values(['country', 'date'])
+    daily['avg_sentiment'] = daily['sentiment_sum'] / daily['article_count'].replace(0, np.nan)
+
+    indexed = daily.set_index('date')
+    for days in windows:
+        rolled = indexed.groupby('country')[['sentiment_sum', 'article_count']].rolling(f'{days}D').sum()
+        daily[f'sentiment_{days}d'] = (
+            rolled['sentiment_sum'] / rolled['article_count'].replace(0, np.nan)
+        ).to_numpy()
+    return daily.reset_index(drop=True)
+
+
+def window_summary(daily: pd.DataFrame, as_of=None, windows: tuple = WINDOWS) -> pd.DataFrame:
+    """Average sentiment per country over the last N days ending at `as_of`"""
+    as_of = pd.Timestamp(as_of) if as_of is not None else daily['date'].max()
+    summary = pd.DataFrame({'country': daily['country'].unique()})
+    for days in windows:
+        recent = daily[(daily['date'] > as_of - pd.Timedelta(days=days)) & (daily['date'] <= as_of)]
+        totals = recent.groupby('country')[['sentiment_sum', 'article_count']].sum()
+        summary[f'sentiment_{days}d'] = summary['country'].map(
+            totals['sentiment_sum'] / totals['article_count'].replace(0, np.nan)
+        )
+    return summary
@@ -1,19 +1,28 @@
 import pandas as pd
-import numpy as np
 from pathlib import Path
 import yaml
-from statsmodels.tsa.arima.model import ARIMA
-from prophet import Prophet
 import warnings
+import sys
 warnings.filterwarnings("ignore")
 
+sys.path.append(str(Path(__file__).parent.parent))
+from data_processing.fx_store import load_fx_prices, consolidate_fx_store
+from data_processing.fx_metrics import to_position_matrix, compute_fx_metrics, volatility_series
+from data_processing.fx_forecasting import run_forecasts, summarize_timings, ForecastCache
+from instrumentation import timer, instrumented_run
+
 DATA_PATH = Path(__file__).parent.parent.parent / "data"
 CONFIG_PATH = Path(__file__).parent.parent.parent / "config"
 
 class FXVolatility:
-    def __init__(self, window=90, var_confidence=0.95):
+    def __init__(self, window=90, var_confidence=0.95, forecast_workers=None, forecast_timeout=300,
+                 use_forecast_cache=True):
         self.window = window
         self.var_confidence = var_confidence
+        self.forecast_workers = forecast_workers
+        self.forecast_timeout = forecast_timeout
+        self.forecast_timings = None
+        self.forecast_cache = ForecastCache() if use_forecast_cache else None
         self.country_map = self._load_country_mapping()
         self.fx_data = self._load_and_preprocess_data()
     
@@ -44,92 +53,28 @@ class FXVolatility:
             'ROU': 'ROU'   # Romania
         }
     
-    def _calculate_drawdowns(self, series):
-        """Calculate rolling maximum drawdown"""
-        rolling_max = series.rolling(self.window, min_periods=1).max()
-        drawdown = (series - rolling_max) / rolling_max
-        return drawdown.rolling(self.window).mean()
-    
-    def _calculate_var(self, returns):
-        """Calculate Value at Risk using historical simulation"""
-        return np.percentile(returns.dropna(), (1 - self.var_confidence)*100)
-
-    def _forecast_arima(self, series):
-        """ARIMA(1,1,1) forecast for next 30 days"""
-        try:
-            model = ARIMA(series, order=(1,1,1))
-            model_fit = model.fit()
-            forecast = model_fit.forecast(steps=30)
-            return forecast.mean()
-        except:
-            return np.nan
-
-    def _forecast_prophet(self, series):
-        """Prophet forecast for next 30 days"""
-        try:
-            df = pd.DataFrame({
-                'ds': series.index,
-                'y': series.values
-            })
-            model = Prophet(daily_seasonality=False)
-            model.fit(df)
-            future = model.make_future_dataframe(periods=30)
-            forecast = model.predict(future)
-            return forecast.tail(30)['yhat'].mean()
-        except:
-            return np.nan
-
-    
     def _load_and_preprocess_data(self) -> pd.DataFrame:
-        """Load all FX CSV files and combine into single DataFrame"""
-        fx_files = (DATA_PATH / "raw/fx").rglob("*.csv")
-        
-        dfs = []
-        for file in fx_files:
-            try:
-                # Extract currency pair from filename
-                pair = file.stem.split("_")[0]  
-                region = file.parent.name
-                
-                df = pd.read_csv(file, parse_dates=['Date'], index_col='Date')
-                df['pair'] = pair
-                df['region'] = region
-                dfs.append(df)
-            except Exception as e:
-                print(f"Error processing {file.name}: {str(e)}")
-                continue
-        
-        return pd.concat(dfs).sort_index()
+        """Load Close prices for all pairs from the consolidated FX store"""
+        fx_data = load_fx_prices(columns=['Close', 'region'])
+        return fx_data.set_index('Date').sort_index()
 
     def calculate_volatility(self) -> pd.DataFrame:
-        """Calculate rolling volatility for each currency pair"""
+        """Calculate rolling volatility, drawdown and VaR for all currency pairs"""
         if self.fx_data.empty:
             raise ValueError("No FX data loaded")
         
-        # Calculate daily returns
-        returns = self.fx_data.groupby('pair')['Close'] \
-            .transform(lambda x: x.astype(float).pct_change())
-        
-        metrics = []
+        with timer("fx.compute_metrics"):
+            prices, dates, pairs = to_position_matrix(self.fx_data)
+            metrics_df, vol = compute_fx_metrics(prices, dates, pairs, self.window, self.var_confidence)
+        vol_series = volatility_series(vol, pairs)
 
-        for pair, group in self.fx_data.groupby('pair'):
-            pair_data = group['Close'].astype(float)
-            returns = pair_data.pct_change().dropna()
-            
-            # Basic volatility
-            vol = returns.rolling(self.window).std() * np.sqrt(252)
-            
-            # Additional metrics
-            metrics.append({
-                'pair': pair,
-                'volatility': vol.iloc[-1],
-                'drawdown': self._calculate_drawdowns(pair_data).iloc[-1],
-                'var': self._calculate_var(returns),
-                'arima_forecast': self._forecast_arima(vol.dropna()),
-                'prophet_forecast': self._forecast_prophet(vol.dropna())
-            })
-            
-        metrics_df = pd.DataFrame(metrics)
+        # ARIMA and Prophet fits run in parallel over a process pool
+        forecasts, self.forecast_timings = run_forecasts(
+            vol_series, max_workers=self.forecast_workers, timeout=self.forecast_timeout,
+            cache=self.forecast_cache
+        )
+        metrics_df = metrics_df.join(forecasts, on='pair')
+        print("Forecast fit durations:\n", summarize_timings(self.forecast_timings))
         
         # Map to country codes
         metrics_df['country'] = metrics_df['pair'].str[3:].map(self.country_map)
@@ -144,5 +89,7 @@ class FXVolatility:
         print(f"Saved volatility data to {output_path}")
 
 if __name__ == "__main__":
-    calculator = FXVolatility()
-    calculator.save_volatility_data()
\ No newline at end of file
+    with instrumented_run("volatility_calculations"):
+        consolidate_fx_store()
+        calculator = FXVolatility()
+        calculator.save_volatility_data()
\ No newline at end of file
@@ -0,0 +1,141 @@
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+METRICS_PATH = PROJECT_ROOT / "data/metrics"
+# Set to 1 to also write a cProfile dump (readable with pstats or snakeviz) for every instrumented run
+PROFILE_ENV = "EM_PROFILE"
+
+
+class Metrics:
+    """Thread-safe timers and counters for one process"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.timers = {}
+            self.counters = {}
+
+    def record_time(self, name: str, seconds: float):
+        with self._lock:
+            stats = self.timers.setdefault(name, {'count': 0, 'total_s': 0.0, 'min_s': seconds, 'max_s': seconds})
+            stats['count'] += 1
+            stats['total_s'] += seconds
+            stats['min_s'] = min(stats['min_s'], seconds)
+            stats['max_s'] = max(stats['max_s'], seconds)
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def merge(self, snapshot: dict):
+        """Add the timers and counters of another process's snapshot, e.g. from a pool worker"""
+        with self._lock:
+            for name, other in snapshot['timers'].items():
+                stats = self.timers.setdefault(name, {'count': 0, 'total_s': 0.0,
+                                                      'min_s': other['min_s'], 'max_s': other['max_s']})
+                stats['count'] += other['count']
+                stats['total_s'] += other['total_s']
+                stats['min_s'] = min(stats['min_s'], other['min_s'])
+                stats['max_s'] = max(stats['max_s'], other['max_s'])
+            for name, n in snapshot['counters'].items():
+                self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            timers = {
+                name: {**stats, 'mean_s': stats['total_s'] / stats['count']}
+                for name, stats in sorted(self.timers.items())
+            }
+            return {'timers': timers, 'counters': dict(sorted(self.counters.items()))}
+
+
+METRICS = Metrics()
+
+
+def record_time(name: str, seconds: float):
+    METRICS.record_time(name, seconds)
+
+
+def count(name: str, n: int = 1):
+    METRICS.count(name, n)
+
+
+@contextmanager
+def timer(name: str):
+    """Time the enclosed block under `name`; failed blocks are timed too and counted as '<name>.errors'"""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        METRICS.count(f"{name}.errors")
+        raise
+    finally:
+        METRICS.record_time(name, time.perf_counter() - start)
+
+
+def timed(name: str = None):
+    """Decorator timing every call of a function, named after the function by default"""
+    def decorator(func):
+        label = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def write_metrics(run_name: str, path: Path = None, started: datetime = None) -> Path:
+    """Write this process's timers and counters as JSON, by default to data/metrics/<run>_<timestamp>.json"""
+    finished = datetime.now(timezone.utc)
+    if path is None:
+        path = METRICS_PATH / f"{run_name}_{finished:%Y%m%dT%H%M%S}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        'run': run_name,
+        'pid': os.getpid(),
+        'started': started.isoformat() if started else None,
+        'finished': finished.isoformat(),
+        **METRICS.snapshot(),
+    }
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+@contextmanager
+def instrumented_run(run_name: str, profile: bool = None):
+    """Collect metrics for the enclosed run and write them to a metrics file when it ends.
+
+    With `profile` (or EM_PROFILE=1) the run is also profiled with cProfile and
+    the stats are dumped next to the metrics file. For sampling flame graphs,
+    run the same entry point under `py-spy record`; the metrics file records
+    the pid to match the two.
+    """
+    profile = os.environ.get(PROFILE_ENV) == "1" if profile is None else profile
+    METRICS.reset()
+    started = datetime.now(timezone.utc)
+    profiler = cProfile.Profile() if profile else None
+    if profiler:
+        profiler.enable()
+    try:
+        with timer(f"{run_name}.total"):
+            yield METRICS
+    finally:
+        if profiler:
+            profiler.disable()
+        path = write_metrics(run_name, started=started)
+        if profiler:
+            profiler.dump_stats(path.with_suffix(".prof"))
+        print(f"Saved metrics to {path}")
@@ -0,0 +1,259 @@
+import pandas as pd
+from pathlib import Path
+from dataclasses import dataclass
+from typing import Callable
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import argparse
+import hashlib
+import json
+import time
+import os
+import sys
+
+sys.path.append(str(Path(__file__).parent))
+from instrumentation import instrumented_run, PROFILE_ENV
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DATA_PATH = PROJECT_ROOT / "data"
+STATE_FILE = DATA_PATH / "cache/pipeline_state.json"
+
+
+# Stage entry points: top-level functions so they can run in worker processes.
+# Each imports its module on demand, so a stage only loads the libraries it needs.
+
+def collect_fx():
+    from data_collection.fx_data import main
+    main()
+
+def collect_macro():
+    from data_collection.macroeconomic_data import main
+    main()
+
+def collect_news():
+    from data_collection.news_collector import main
+    main()
+
+def process_fx():
+    from data_processing.fx_store import consolidate_fx_store
+    from data_processing.volatility_calculations import FXVolatility
+    consolidate_fx_store()
+    FXVolatility().save_volatility_data()
+
+def process_sentiment():
+    from data_processing.process_news_sentiment import NewsSentimentProcessor
+    NewsSentimentProcessor().process_sentiment()
+
+def process_macro():
+    from data_processing.process_macro_data import process_macro_data
+    process_macro_data()
+
+def assess_risk():
+    from data_processing.risk_assessment import main
+    main()
+
+
+@dataclass
+class Stage:
+    """One pipeline step. `inputs` and `outputs` are paths relative to the project root.
+
+    A stage without inputs (the collectors) always runs; any other stage is
+    skipped when the content of its inputs is unchanged since its last
+    successful run and its outputs still exist.
+    """
+    name: str
+    run: Callable
+    deps: tuple = ()
+    inputs: tuple = ()
+    outputs: tuple = ()
+
+
+STAGES = [
+    Stage("collect_fx", collect_fx),
+    Stage("collect_macro", collect_macro),
+    Stage("collect_news", collect_news),
+    Stage("process_fx", process_fx, deps=("collect_fx",),
+          inputs=("data/raw/fx", "config/countries_regions.yaml"),
+          outputs=("data/processed/fx_volatility.parquet", "data/processed/fx_prices")),
+    Stage("process_sentiment", process_sentiment, deps=("collect_news",),
+          inputs=("data/raw/news", "config/countries_regions.yaml"),
+          outputs=("data/processed/news_sentiment.parquet",)),
+    Stage("process_macro", process_macro, deps=("collect_macro",),
+          inputs=("data/raw/macroeconomic", "config/countries_regions.yaml"),
+          outputs=("data/processed/macro_indicators.parquet",)),
+    # Also builds the dashboard slices, which read the FX store and the raw news
+    Stage("assess_risk", assess_risk, deps=("process_fx", "process_sentiment", "process_macro"),
+          inputs=("data/processed/fx_volatility.parquet", "data/processed/news_sentiment.parquet",
+                  "data/processed/macro_indicators.parquet", "data/processed/fx_prices", "data/raw/news",
+                  "config/risk_features.yaml", "config/countries_regions.yaml"),
+          outputs=("data/processed/risk_scores.parquet", "data/processed/dashboard")),
+]
+
+
+class Fingerprinter:
+    """Content fingerprints of stage inputs.
+
+    File hashes are remembered with the size and mtime they were computed
+    for, so unchanged files are not read again on the next run.
+    """
+    def __init__(self, known: dict = None):
+        self.files = dict(known or {})
+
+    def _file_hash(self, file: Path) -> str:
+        key = file.relative_to(PROJECT_ROOT).as_posix()
+        stat = file.stat()
+        cached = self.files.get(key)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime:
+            return cached[2]
+        digest = hashlib.sha1(file.read_bytes()).hexdigest()
+        self.files[key] = [stat.st_size, stat.st_mtime, digest]
+        return digest
+
+    def fingerprint(self, inputs: tuple) -> str:
+        files = []
+        for name in inputs:
+            path = PROJECT_ROOT / name
+            if path.is_dir():
+                files.extend(f for f in path.rglob("*") if f.is_file())
+            elif path.exists():
+                files.append(path)
+        digest = hashlib.sha1()
+        for file in sorted(files):
+            digest.update(f"{file.relative_to(PROJECT_ROOT).as_posix()}:{self._file_hash(file)}\n".encode())
+        return digest.hexdigest()
+
+
+def topological_order(stages: list) -> list:
+    """Stage names with every stage after its dependencies.
+
+    Raises ValueError for duplicate stage names, unknown dependencies or a
+    dependency cycle, any of which would leave a stage waiting forever.
+    """
+    by_name = {stage.name: stage for stage in stages}
+    if len(by_name) != len(stages):
+        raise ValueError("Duplicate stage names")
+    unknown = {dep for stage in stages for dep in stage.deps} - set(by_name)
+    if unknown:
+        raise ValueError(f"Unknown stage dependencies: {sorted(unknown)}")
+
+    order = []
+    remaining = {stage.name: set(stage.deps) for stage in stages}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Dependency cycle between stages: {sorted(remaining)}")
+        for name in ready:
+            order.append(name)
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return order
+
+
+def _load_state() -> dict:
+    if STATE_FILE.exists():
+        with open(STATE_FILE) as f:
+            return json.load(f)
+    return {'fingerprints': {}, 'files': {}}
+
+
+def _save_state(state: dict):
+    STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = STATE_FILE.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2)
+    tmp.replace(STATE_FILE)
+
+
+def _timed(name: str, run) -> float:
+    # Each stage process writes its own metrics file (and profile with EM_PROFILE=1)
+    start = time.perf_counter()
+    with instrumented_run(name):
+        run()
+    return time.perf_counter() - start
+
+
+def run_pipeline(stages: list = STAGES, skip_collect: bool = False, force: bool = False,
+                 max_workers: int = None) -> pd.DataFrame:
+    """Run the stages as a dependency DAG, each stage in its own process.
+
+    A stage starts as soon as all of its dependencies have finished, so the
+    collectors run side by side, followed by the FX, sentiment and macro
+    processors, followed by the risk assessment. Stages whose inputs are
+    unchanged are skipped unless `force`; stages downstream of a failure are
+    not run. Returns one row per stage with its status and timings.
+    """
+    # Validate the DAG up front; a stage that can never start would stall the loop below
+    order = topological_order(stages)
+    by_name = {stage.name: stage for stage in stages}
+
+    state = _load_state()
+    fingerprinter = Fingerprinter(state['files'])
+    pending = {name: by_name[name] for name in order}
+    status = {}
+    report = {}
+    running = {}
+    pipeline_start = time.perf_counter()
+
+    def record(name, result, seconds=0.0, started=None):
+        status[name] = result
+        report[name] = {'stage': name, 'status': result, 'seconds': seconds,
+                        'started_at': started if started is not None else time.perf_counter() - pipeline_start}
+        print(f"[{name}] {result} ({seconds:.1f}s)")
+
+    with ProcessPoolExecutor(max_workers=max_workers or len(stages)) as executor:
+        while pending or running:
+            for name, stage in list(pending.items()):
+                if any(dep not in status for dep in stage.deps):
+                    continue
+                del pending[name]
+                if any(status[dep] in ('failed', 'upstream failed') for dep in stage.deps):
+                    record(name, 'upstream failed')
+                    continue
+                if skip_collect and not stage.inputs:
+                    record(name, 'skipped')
+                    continue
+                fingerprint = fingerprinter.fingerprint(stage.inputs) if stage.inputs else None
+                outputs_exist = all((PROJECT_ROOT / out).exists() for out in stage.outputs)
+                if (not force and fingerprint is not None and outputs_exist
+                        and state['fingerprints'].get(name) == fingerprint):
+                    record(name, 'unchanged')
+                    continue
+                print(f"[{name}] started")
+                future = executor.submit(_timed, name, stage.run)
+                running[future] = (name, fingerprint, time.perf_counter() - pipeline_start)
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, fingerprint, started = running.pop(future)
+                try:
+                    seconds = future.result()
+                except Exception as e:
+                    print(f"[{name}] error: {str(e)}")
+                    record(name, 'failed', time.perf_counter() - pipeline_start - started, started)
+                    continue
+                record(name, 'ok', seconds, started)
+                # Fingerprint taken before the run, so edits made while it ran trigger a rerun
+                if fingerprint is not None:
+                    state['fingerprints'][name] = fingerprint
+
+    state['files'] = fingerprinter.files
+    _save_state(state)
+
+    timings = pd.DataFrame([report[stage.name] for stage in stages])
+    print(f"Pipeline finished in {time.perf_counter() - pipeline_start:.1f}s")
+    print(timings.to_string(index=False))
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Collect, process and score all data")
+    parser.add_argument("--skip-collect", action="store_true", help="only run the processing stages")
+    parser.add_argument("--force", action="store_true", help="rerun stages even if their inputs are unchanged")
+    parser.add_argument("--workers", type=int, default=None, help="max stages running at once")
+    parser.add_argument("--profile", action="store_true", help="write a cProfile dump for every stage")
+    args = parser.parse_args()
+    if args.profile:
+        os.environ[PROFILE_ENV] = "1"
+    run_pipeline(skip_collect=args.skip_collect, force=args.force, max_workers=args.workers)
@@ -0,0 +1,137 @@
+import streamlit as st
+import pandas as pd
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+import sys
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from data_processing.fx_store import load_fx_prices, partition_file
+from data_processing.fx_downsample import build_pyramid, chart_points
+from data_processing.dashboard_slices import (
+    RADAR_SCORES, RECENT_NEWS_DAYS, CONFIG_PATH, slice_file, country_mapping, load_recent_news
+)
+from data_collection.news_dedup import INDEX_FILE as NEWS_INDEX_FILE
+from instrumentation import timed
+
+DATA_PATH = Path(__file__).parent.parent.parent.parent / "data"
+# Upper bound on how long a cached dataset is served; a changed file is picked up immediately
+CACHE_TTL = 600
+# History shown by the currency chart's range selector
+FX_PERIODS = {'3M': pd.DateOffset(months=3), '1Y': pd.DateOffset(years=1),
+              '5Y': pd.DateOffset(years=5), 'All': None}
+
+DATASETS = {
+    'macro_df': "processed/macro_indicators.parquet",
+    'vol_df': "processed/fx_volatility.parquet",
+    'sentiment_df': "processed/news_sentiment.parquet",
+    'risk_df': "processed/risk_scores.parquet",
+}
+
+
+def _mtime(path: Path):
+    return path.stat().st_mtime if path.exists() else None
+
+
+# Timers inside st.cache_data only see cache misses (actual disk reads); the
+# public loaders below are timed on every call, cache hits included
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+@timed("dashboard.read_parquet")
+def _read_parquet(path: str, mtime: float) -> pd.DataFrame:
+    # `mtime` is only part of the cache key, so rewriting the file invalidates the entry
+    return pd.read_parquet(path)
+
+
+def read_parquet(path: Path) -> pd.DataFrame:
+    return _read_parquet(str(path), _mtime(path))
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _country_mapping(mtime: float) -> dict:
+    return country_mapping()
+
+
+# Fallbacks for when the pipeline has not built the slices yet. Like _read_parquet they
+# are keyed on the mtime of the store behind them: the pair's FX partition, and the news
+# dedup index, which the collector updates whenever it saves articles.
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+@timed("dashboard.build_fx_pyramid")
+def _fx_pyramid(pair: str, mtime: float) -> pd.DataFrame:
+    # Read-only: the pipeline consolidates the store, the dashboard never writes to it
+    return build_pyramid(load_fx_prices(pairs=[pair], columns=['Close'], refresh=False))
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+@timed("dashboard.read_recent_news")
+def _recent_news(mtime: float) -> pd.DataFrame:
+    return load_recent_news()
+
+
+def load_crncy_mapping() -> dict:
+    return {
+            'IDN':'IDR',  # Indonesia
+            'MYS':'MYR',  # Malaysia
+            'THA':'THB',  # Thailand
+            'CHN':'CNY',  # China
+            'IND':'INR',  # India
+            'MEX':'MXN',  # Mexico
+            'BRA':'BRL',  # Brazil
+            'COL':'COP',  # Colombia
+            'CHL':'CLP',  # Chile
+            'PER':'PEN',  # Peru
+            'ZAF':'ZAR',  # South Africa
+            'POL':'PLN',  # Poland
+            'HUN':'HUF',  # Hungary
+            'TUR':'TRY',  # Turkey
+            'CZE':'CZK',  # Czech Republic
+            'EGY':'EGP',  # Egypt
+            'ROU':'ROU'   # Romania
+    }
+
+
+class DashboardData:
+    """Dict-like access to dashboard datasets, each read on first use and cached across reruns"""
+    @timed("dashboard.load_data")
+    def __getitem__(self, key):
+        if key in DATASETS:
+            return read_parquet(DATA_PATH / DATASETS[key])
+        if key == 'country_crncy':
+            return load_crncy_mapping()
+        if key == 'country_mapping':
+            return _country_mapping(_mtime(CONFIG_PATH / "countries_regions.yaml"))
+        raise KeyError(key)
+
+
+@timed("dashboard.fx_series")
+def fx_series(country: str, period: str = 'All') -> pd.DataFrame:
+    """Close prices of a country's USD pair over `period`, downsampled to at most MAX_POINTS.
+
+    Reads the pair's precomputed pyramid when available and picks the finest
+    level that fits the requested range.
+    """
+    path = slice_file(country, 'fx')
+    if path.exists():
+        pyramid = read_parquet(path)
+    else:
+        pair = f"USD{load_crncy_mapping()[country]}"
+        pyramid = _fx_pyramid(pair, _mtime(partition_file(pair)))
+    offset = FX_PERIODS[period]
+    start = pyramid['Date'].max() - offset if offset is not None and not pyramid.empty else None
+    return chart_points(pyramid, start=start)
+
+
+@timed("dashboard.recent_news")
+def recent_news(country: str, days: int = RECENT_NEWS_DAYS) -> pd.DataFrame:
+    """A country's articles from the last `days` days, newest first"""
+    path = slice_file(country, 'news')
+    news = read_parquet(path) if path.exists() else _recent_news(_mtime(NEWS_INDEX_FILE))
+    news = news[news['country'] == country]
+    # Slices are built by the pipeline, so drop articles that aged out since then
+    return news[news['publishedAt'] >= datetime.now(timezone.utc) - timedelta(days=days)]
+
+
+@timed("dashboard.radar_vector")
+def radar_vector(country: str):
+    """Radar chart scores of a country in RADAR_SCORES order"""
+    path = slice_file(country, 'radar')
+    radar = read_parquet(path) if path.exists() else DashboardData()['risk_df']
+    return radar.loc[radar['country'] == country, RADAR_SCORES].values[0]
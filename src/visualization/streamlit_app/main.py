@@ -1,94 +1,21 @@
 # src/visualization/dashboard.py
 import streamlit as st
-import yaml
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from pathlib import Path
-from datetime import datetime, timedelta, timezone
+import sys
 
-DATA_PATH = Path(__file__).parent.parent.parent.parent / "data"
-CONFIG_PATH = Path(__file__).parent.parent.parent.parent / "config"
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from visualization.streamlit_app.data_layer import DashboardData, FX_PERIODS, fx_series, recent_news, radar_vector
+from instrumentation import METRICS_PATH, timed, write_metrics
 
-# Cache data loading
-# @st.cache_data
 def load_data():
-    return {
-        'macro_df': pd.read_parquet(DATA_PATH / "processed/macro_indicators.parquet"),
-        'vol_df': pd.read_parquet(DATA_PATH / "processed/fx_volatility.parquet"),
-        'sentiment_df': pd.read_parquet(DATA_PATH / "processed/news_sentiment.parquet"),
-        'risk_df': pd.read_parquet(DATA_PATH / "processed/risk_scores.parquet"),
-        'fx_rates': load_fx_rates(),
-        'news': load_recent_news(),
-        'country_crncy': load_crncy_mapping(),
-        'country_mapping': country_mapping() 
-    }
-
-def load_fx_rates():
-    """Load all FX CSV files and combine into single DataFrame"""
-    fx_files = (DATA_PATH / "raw/fx").rglob("*.csv")
-    
-    dfs = []
-    for file in fx_files:
-        try:
-            # Extract currency pair from filename
-            pair = file.stem.split("_")[0]  
-            region = file.parent.name
-            df = pd.read_csv(file, parse_dates=['Date'])
-            df['pair'] = pair
-            df['region'] = region
-            dfs.append(df)
-        except Exception as e:
-            print(f"Error processing {file.name}: {str(e)}")
-            continue
-    
-    return pd.concat(dfs).sort_index()
-
-
-def country_mapping():
-    with open(CONFIG_PATH / "countries_regions.yaml") as f:
-        return yaml.safe_load(f)['country_mapping']
-
-def load_recent_news():
-    """Load last 7 news articles"""
-    news_files = (DATA_PATH / "raw/news").rglob("*.parquet")
-    dfs = []
-    for file in news_files:
-        df = pd.read_parquet(file)
-        country_name = file.parent.name.replace("_", " ")
-        country_map = country_mapping()
-        df['country'] = country_map.get(country_name, "UNKNOWN")
-        dfs.append(df)
-    all_news = pd.concat(dfs)
-    all_news['publishedAt'] = pd.to_datetime(all_news['publishedAt'])
-    now_utc = datetime.now(timezone.utc)
-    return all_news[all_news['publishedAt'] >= now_utc - timedelta(days=7)]
-
-
-
-def load_crncy_mapping() -> dict:
-    return {
-            'IDN':'IDR',  # Indonesia
-            'MYS':'MYR',  # Malaysia
-            'THA':'THB',  # Thailand
-            'CHN':'CNY',  # China
-            'IND':'INR',  # India
-            'MEX':'MXN',  # Mexico
-            'BRA':'BRL',  # Brazil
-            'COL':'COP',  # Colombia
-            'CHL':'CLP',  # Chile
-            'PER':'PEN',  # Peru
-            'ZAF':'ZAR',  # South Africa
-            'POL':'PLN',  # Poland
-            'HUN':'HUF',  # Hungary
-            'TUR':'TRY',  # Turkey
-            'CZE':'CZK',  # Czech Republic
-            'EGY':'EGP',  # Egypt
-            'ROU':'ROU'   # Romania
-    }
-
+    """Lazily loaded datasets, cached until their files change (or CACHE_TTL passes)"""
+    return DashboardData()
 
 
+@timed("dashboard.rerun")
 def create_dashboard():
     st.set_page_config(page_title="EM Investor Dashboard", layout="wide")
     data = load_data()
@@ -127,7 +54,8 @@ def create_dashboard():
         # Currency trend plot
         currency_pair = f"USD{data['country_crncy'][selected_country]}"
         st.subheader(f"Currency Trend ({currency_pair})")
-        fx_data = data['fx_rates'][data['fx_rates']['pair'] == currency_pair]
+        period = st.radio("History", list(FX_PERIODS), index=len(FX_PERIODS) - 1, horizontal=True)
+        fx_data = fx_series(selected_country, period)
         if not fx_data.empty:
             fig = px.line(fx_data, x='Date', y='Close',
                           title=f"{currency_pair} Exchange Rate")
@@ -138,7 +66,7 @@ def create_dashboard():
     with col2:
         # Recent news with sentiment
         st.subheader("Recent Market News & Sentiment")
-        country_news = data['news'][data['news']['country'] == selected_country]
+        country_news = recent_news(selected_country)
         
         if not country_news.empty:
             st.dataframe(country_news.head(10),hide_index=True)
@@ -152,8 +80,7 @@ def create_dashboard():
     
     fig = go.Figure()
     fig.add_trace(go.Scatterpolar(
-        r=data['risk_df'].loc[data['risk_df']['country'] == selected_country, 
-        ['gdp_score', 'inflation_score', 'fx_score', 'drawdown_score', 'var_score', 'prophet_score', 'sentiment_score','debt_score', 'current_account_score']].values[0],
+        r=radar_vector(selected_country),
         theta=categories,
         fill='toself',
         name=selected_country
@@ -271,4 +198,6 @@ def create_dashboard():
     )
 
 if __name__ == "__main__":
-    create_dashboard()
\ No newline at end of file
+    create_dashboard()
+    # Cumulative over the session's reruns; rewritten after each one
+    write_metrics("dashboard", path=METRICS_PATH / "dashboard.json")
\ No newline at end of file
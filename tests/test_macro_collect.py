@@ -0,0 +1,124 @@
+import json
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import urlparse
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+import data_collection.macroeconomic_data as macroeconomic_data
+
+# Simulated World Bank round trip, so the timings are dominated by waiting on the network
+LATENCY = 0.02
+YEARS = range(2015, 2025)
+
+
+class WorldBankStub(BaseHTTPRequestHandler):
+    """Answers /country/<codes>/indicator/<id> like the World Bank API, after LATENCY seconds"""
+    requests_seen = []
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        time.sleep(LATENCY)
+        parts = urlparse(self.path).path.split("/")
+        countries = parts[parts.index("country") + 1].split(";")
+        indicator = parts[parts.index("indicator") + 1]
+        with self.lock:
+            self.requests_seen.append((tuple(countries), indicator))
+        records = [
+            {'indicator': {'id': indicator}, 'countryiso3code': country, 'date': str(year), 'value': 1.0}
+            for country in countries for year in YEARS
+        ]
+        body = json.dumps([{'page': 1, 'pages': 1, 'total': len(records)}, records]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StubServer(ThreadingHTTPServer):
+    # The default backlog of 5 drops connections when 16 workers connect at once
+    request_queue_size = 64
+    daemon_threads = True
+
+
+@pytest.fixture
+def world_bank():
+    WorldBankStub.requests_seen = []
+    server = StubServer(("127.0.0.1", 0), WorldBankStub)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def _expected_keys() -> set:
+    indicators = [i for group in macroeconomic_data.load_config("indicators.yaml")["indicators"].values()
+                  for i in group]
+    return {(country, indicator) for country in macroeconomic_data.load_region_lookup() for indicator in indicators}
+
+
+def _timed_collect(base_url: str, max_workers: int) -> tuple:
+    start = time.perf_counter()
+    results = macroeconomic_data.collect_concurrent(max_workers=max_workers, countries_per_request=1,
+                                                    base_url=base_url, save=False)
+    return results, time.perf_counter() - start
+
+
+def test_concurrent_requests_overlap_latency(world_bank):
+    serial, serial_s = _timed_collect(world_bank, 1)
+    four, four_s = _timed_collect(world_bank, 4)
+    sixteen, sixteen_s = _timed_collect(world_bank, 16)
+
+    assert set(serial) == set(four) == set(sixteen) == _expected_keys()
+    # More workers hide more of the per-request latency
+    assert serial_s / four_s > 2
+    assert serial_s / sixteen_s > 4
+    assert sixteen_s < four_s
+
+
+def test_countries_are_batched_per_request(world_bank, tmp_path, monkeypatch):
+    monkeypatch.setattr(macroeconomic_data, "DATA_PATH", tmp_path)
+    countries = list(macroeconomic_data.load_region_lookup())
+    expected = _expected_keys()
+    indicators = {indicator for _, indicator in expected}
+
+    results = macroeconomic_data.collect_concurrent(max_workers=4, countries_per_request=5, base_url=world_bank)
+
+    # ceil(countries / 5) semicolon-joined requests per indicator instead of one per country
+    batches = -(-len(countries) // 5)
+    assert len(WorldBankStub.requests_seen) == batches * len(indicators)
+    assert all(len(batch) <= 5 for batch, _ in WorldBankStub.requests_seen)
+    for indicator in indicators:
+        requested = [c for batch, i in WorldBankStub.requests_seen if i == indicator for c in batch]
+        assert sorted(requested) == sorted(countries)
+
+    # Each batched response is split back into one payload and file per country
+    assert set(results) == expected
+    for (country, indicator), payload in results.items():
+        assert {item['countryiso3code'] for item in payload[1]} == {country}
+        assert len(payload[1]) == len(YEARS)
+    assert len(list(tmp_path.rglob("*.json"))) == len(expected)
+
+
+def test_split_by_country():
+    header = {'page': 1, 'pages': 1}
+    data = [header, [
+        {'countryiso3code': 'BRA', 'date': '2020', 'value': 1.0},
+        {'countryiso3code': 'MEX', 'date': '2020', 'value': 2.0},
+        {'countryiso3code': 'BRA', 'date': '2021', 'value': 3.0},
+    ]]
+    split = macroeconomic_data.split_by_country(data)
+    assert set(split) == {'BRA', 'MEX'}
+    assert split['BRA'][0] == header
+    assert [item['date'] for item in split['BRA'][1]] == ['2020', '2021']
+    assert macroeconomic_data.split_by_country(None) == {}
+    assert macroeconomic_data.split_by_country([header, None]) == {}
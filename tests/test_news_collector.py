@@ -0,0 +1,162 @@
+import functools
+import json
+import sys
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+import pandas as pd
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+import data_collection.news_collector as news_collector
+from data_collection.news_dedup import NewsDedupIndex
+
+PUBLISHED = ["2026-10-17T10:00:00Z", "2026-10-17T12:00:00Z"]
+
+
+def _articles(country: str) -> list:
+    """Two distinct articles per country, the first one repeated in the response"""
+    slug = country.replace(" ", "-").lower()
+    first = {'title': f"{country} raises rates", 'url': f"https://news.example/{slug}/1",
+             'publishedAt': PUBLISHED[0], 'source': {'name': 'Wire'}, 'content': "Rates up"}
+    second = {'title': f"{country} growth beats forecasts", 'url': f"https://news.example/{slug}/2",
+              'publishedAt': PUBLISHED[1], 'source': {'name': 'Wire'}, 'content': "Growth up"}
+    return [first, second, dict(first)]
+
+
+def _quoted_country(query: str) -> str:
+    # Both providers' queries start with the quoted country name
+    return query.split('"')[1]
+
+
+class NewsStub(BaseHTTPRequestHandler):
+    """NewsAPI under /newsapi and GDELT under /gdelt; NewsAPI answers 429 once its budget is spent"""
+    newsapi_budget = 0
+    requests_seen = []
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: dict):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if url.path.startswith("/newsapi"):
+            country = _quoted_country(params['q'])
+            with self.lock:
+                allowed = NewsStub.newsapi_budget > 0
+                NewsStub.newsapi_budget -= allowed
+                self.requests_seen.append(('newsapi', country, params, allowed))
+            if not allowed:
+                return self._send(429, {'status': 'error', 'code': 'rateLimited'})
+            return self._send(200, {'status': 'ok', 'articles': _articles(country)})
+
+        country = _quoted_country(params['query'])
+        with self.lock:
+            self.requests_seen.append(('gdelt', country, params, True))
+        articles = [{
+            'title': a['title'],
+            'url': a['url'],
+            'seendate': pd.Timestamp(a['publishedAt']).strftime("%Y%m%dT%H%M%SZ"),
+            'domain': "news.example",
+        } for a in _articles(country)]
+        self._send(200, {'articles': articles})
+
+
+class StubServer(ThreadingHTTPServer):
+    request_queue_size = 64
+    daemon_threads = True
+
+
+@pytest.fixture
+def news_api(tmp_path, monkeypatch):
+    monkeypatch.setattr(news_collector, "DATA_PATH", tmp_path / "raw/news")
+    monkeypatch.setattr(news_collector, "NewsDedupIndex",
+                        functools.partial(NewsDedupIndex, path=tmp_path / "news_dedup.sqlite"))
+    NewsStub.requests_seen = []
+    server = StubServer(("127.0.0.1", 0), NewsStub)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    yield base
+    server.shutdown()
+    server.server_close()
+
+
+def _collect(base: str, newsapi_budget: int) -> dict:
+    NewsStub.newsapi_budget = newsapi_budget
+    NewsStub.requests_seen = []
+    # One worker, so countries are fetched in config order
+    return news_collector.collect_news(max_workers=1, newsapi_rate=1000, gdelt_rate=1000,
+                                       newsapi_url=f"{base}/newsapi", gdelt_url=f"{base}/gdelt",
+                                       api_key="test-key")
+
+
+def _countries() -> list:
+    config = news_collector.load_news_config()
+    return [country for countries in config['countries'].values() for country in countries]
+
+
+def test_quota_fallback_to_gdelt(news_api, tmp_path):
+    countries = _countries()
+    counts = _collect(news_api, newsapi_budget=2)
+
+    # Duplicates within a response are dropped, so two articles per country
+    assert counts == {country: 2 for country in countries}
+
+    newsapi = [(c, ok) for source, c, _, ok in NewsStub.requests_seen if source == 'newsapi']
+    gdelt = [c for source, c, _, _ in NewsStub.requests_seen if source == 'gdelt']
+    # Two countries from NewsAPI, then the 429 moves the third and every later country to GDELT
+    assert newsapi == [(countries[0], True), (countries[1], True), (countries[2], False)]
+    assert gdelt == countries[2:]
+
+    files = sorted((tmp_path / "raw/news").rglob("*.parquet"))
+    assert len(files) == len(countries)
+    assert all(len(pd.read_parquet(f)) == 2 for f in files)
+
+
+def test_second_run_uses_cursor_and_saves_nothing(news_api, tmp_path):
+    countries = _countries()
+    _collect(news_api, newsapi_budget=2)
+    assert all('from' not in params and 'startdatetime' not in params
+               for _, _, params, _ in NewsStub.requests_seen)
+
+    latest = pd.Timestamp(PUBLISHED[1])
+    index = NewsDedupIndex(path=tmp_path / "news_dedup.sqlite")
+    assert all(index.latest_published(country) == latest for country in countries)
+
+    counts = _collect(news_api, newsapi_budget=2)
+
+    # Same articles again: nothing new is stored or reported
+    assert counts == {country: 0 for country in countries}
+    # Every request starts one second after the latest stored publishedAt, so it is not fetched again
+    latest += pd.Timedelta(seconds=1)
+    for source, _, params, _ in NewsStub.requests_seen:
+        if source == 'newsapi':
+            assert params['from'] == latest.strftime("%Y-%m-%dT%H:%M:%S")
+        else:
+            assert params['startdatetime'] == latest.strftime("%Y%m%d%H%M%S")
+
+
+def test_cursor_comes_from_the_index_not_the_stored_files(news_api, tmp_path, monkeypatch):
+    _collect(news_api, newsapi_budget=0)
+
+    # A country's files are not read once the index has its high-water mark
+    def fail(*args, **kwargs):
+        raise AssertionError("stored news files were scanned")
+    monkeypatch.setattr(news_collector.pd, "read_parquet", fail)
+    _collect(news_api, newsapi_budget=0)
+
+    expected = (pd.Timestamp(PUBLISHED[1]) + pd.Timedelta(seconds=1)).strftime("%Y%m%d%H%M%S")
+    assert {params['startdatetime'] for source, _, params, _ in NewsStub.requests_seen
+            if source == 'gdelt'} == {expected}
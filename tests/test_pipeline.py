@@ -0,0 +1,33 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+import pipeline
+from pipeline import Stage, topological_order
+
+
+def _noop():
+    pass
+
+
+def test_configured_stages_are_ordered_after_their_dependencies():
+    order = topological_order(pipeline.STAGES)
+    assert sorted(order) == sorted(stage.name for stage in pipeline.STAGES)
+    for stage in pipeline.STAGES:
+        assert all(order.index(dep) < order.index(stage.name) for dep in stage.deps)
+
+
+def test_unknown_dependency_is_rejected():
+    stages = [Stage("a", _noop), Stage("b", _noop, deps=("missing",))]
+    with pytest.raises(ValueError, match="Unknown stage dependencies"):
+        topological_order(stages)
+
+
+def test_cycle_is_rejected_before_running(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, "STATE_FILE", tmp_path / "state.json")
+    stages = [Stage("a", _noop), Stage("b", _noop, deps=("a", "c")), Stage("c", _noop, deps=("b",))]
+    with pytest.raises(ValueError, match=r"cycle between stages: \['b', 'c'\]"):
+        pipeline.run_pipeline(stages)
+    assert not (tmp_path / "state.json").exists()
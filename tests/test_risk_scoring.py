@@ -0,0 +1,24 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent / "src"))
+from data_processing.risk_scoring import FeatureSpec, RiskScoringEngine
+
+
+def test_mean_policy_fills_from_fitted_reference():
+    specs = [FeatureSpec("a_score", "a", 0.5, nan_policy="mean"),
+             FeatureSpec("b_score", "b", 0.5, direction="lower_better", normalization="rank", nan_policy="mean")]
+    reference = pd.DataFrame({'a': [1.0, 2.0, 3.0, 4.0], 'b': [4.0, 3.0, np.nan, 1.0]})
+    engine = RiskScoringEngine(specs).fit(reference)
+    assert engine.score(reference).loc[2, 'b_score'] == 50.0
+
+    gap = pd.DataFrame({'a': [np.nan], 'b': [np.nan]})
+    alone = engine.score(gap)
+    with_others = engine.score(pd.concat([gap, pd.DataFrame({'a': [4.0], 'b': [1.0]})], ignore_index=True))
+
+    # A missing score is the reference mean, whichever rows share the batch
+    assert alone.loc[0, ['a_score', 'b_score']].tolist() == [50.0, 50.0]
+    assert with_others.loc[0, 'risk_score'] == alone.loc[0, 'risk_score'] == 50.0